@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import io
+import json
+import numpy as np
+import os
+import tarfile
+
+from pathlib import Path
+from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Any
+
+
+def add(handle: tarfile.TarFile, name: str, content: bytes) -> None:
+    information = tarfile.TarInfo(name)
+    information.size = len(content)
+    information.mtime = 0
+
+    handle.addfile(information, io.BytesIO(content))
+
+
+def write(
+    path: Path,
+    files: list[tuple[Path, str]],
+    root: Path,
+    size: int = 1000
+) -> list[dict[str, Any]]:
+    path.mkdir(parents=True, exist_ok=True)
+
+    shards = []
+
+    starts = range(0, len(files), size)
+
+    for index, start in enumerate(tqdm(starts, total=len(starts))):
+        name = f"shard-{index:06d}.tar"
+        temporary = path.joinpath(name).with_suffix('.tmp')
+
+        chunk = files[start:start + size]
+
+        # A sample is the audio and its label under one key, written
+        # next to each other so a reader sees them back to back
+        with tarfile.open(temporary, 'w') as handle:
+            for file, label in chunk:
+                key = file.relative_to(root).with_suffix('').as_posix()
+                key = key.replace('.', '_')
+
+                add(handle, f"{key}.wav", file.read_bytes())
+                add(handle, f"{key}.cls", label.encode('utf-8'))
+
+        os.replace(temporary, path.joinpath(name))
+
+        shards.append({'name': name, 'count': len(chunk)})
+
+    index = {
+        'count': len(files),
+        'shards': shards
+    }
+
+    with open(path.joinpath('index.json'), 'w') as handle:
+        json.dump(index, handle, indent=4)
+
+    return shards
+
+
+def main() -> None:
+    dataset = Path.cwd().joinpath('dataset')
+
+    root = dataset.joinpath('render')
+    archive = root.joinpath('archive')
+
+    settings = {
+        'seed': 1220,
+        'size': 1000,
+        'split': {
+            'train': 0.70,
+            'validation': 0.15,
+            'test': 0.15
+        }
+    }
+
+    files = sorted(
+        (file, file.parent.name)
+        for file in root.glob('*/*.wav')
+        if file.is_file()
+    )
+
+    # The samples are shuffled once when written, so a reader only has
+    # to shuffle the order of the shards and a small buffer
+    generator = np.random.default_rng(settings.get('seed'))
+    order = generator.permutation(len(files))
+
+    files = [files[i] for i in order]
+
+    start = 0
+    split = list(settings.get('split').items())
+
+    for i, (name, fraction) in enumerate(split):
+        if i == len(split) - 1:
+            end = len(files)
+        else:
+            end = start + int(len(files) * fraction)
+
+        shards = write(
+            archive.joinpath(name),
+            files[start:end],
+            root,
+            settings.get('size')
+        )
+
+        print(f"{name}: {end - start} files in {len(shards)} shards")
+
+        start = end
+
+
+if __name__ == '__main__':
+    main()
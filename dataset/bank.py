@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+import wav
+
+from pathlib import Path
+from scipy import fft
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from collections.abc import Callable
+
+
+def digest(path: Path) -> str:
+    with open(path, 'rb') as handle:
+        return hashlib.file_digest(handle, 'blake2b').hexdigest()[:32]
+
+
+def replace(path: Path, write: Callable) -> None:
+    # Write next to the destination and rename, so a concurrent reader
+    # never observes a partially written file
+    descriptor, temporary = tempfile.mkstemp(
+        dir=path.parent,
+        suffix='.tmp'
+    )
+
+    try:
+        with os.fdopen(descriptor, 'wb') as handle:
+            write(handle)
+
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def save(path: Path, array: npt.NDArray) -> None:
+    replace(path, lambda handle: np.save(handle, array))
+
+
+def rooms(dataset: Path) -> dict[str, list[Path]]:
+    return {
+        name: sorted(
+            file
+            for file in dataset.joinpath(f"original/rir/{name}room").glob('*/*.wav')
+            if file.is_file()
+        )
+        for name in ['small', 'medium', 'large']
+    }
+
+
+class Bank():
+    def __init__(
+        self,
+        rooms: dict[str, list[Path]] | None = None,
+        cache: Path | None = None
+    ):
+        self.cache = cache
+        self.rooms = rooms
+        self.digest = {}
+        self.impulse = {}
+        self.partitioned = {}
+        self.spectrum = {}
+
+    def _fetch(self, key: str, build: Callable, mmap: bool = False) -> npt.NDArray:
+        if self.cache is None:
+            return build()
+
+        path = self.cache.joinpath(f"{key}.npy")
+
+        if path.exists():
+            try:
+                return np.load(path, mmap_mode='r' if mmap else None)
+            except (OSError, ValueError):
+                pass
+
+        array = build()
+        save(path, array)
+
+        return array
+
+    def load(self, digests: dict[str, list[str]] | None = None) -> None:
+        if self.cache is not None:
+            self.cache.mkdir(exist_ok=True, parents=True)
+
+        # Workers are handed the digests of the parent, so the bank is
+        # only hashed once
+        if digests is None:
+            digests = {
+                room: [digest(file) for file in files]
+                for room, files in self.rooms.items()
+            }
+
+        self.digest = digests
+
+        self.impulse = {
+            room: [
+                self._fetch(key, lambda file=file: wav.load(file)[0])
+                for key, file in zip(self.digest[room], files)
+            ]
+            for room, files in self.rooms.items()
+        }
+
+    def index(self) -> None:
+        index = {
+            room: [
+                {'path': file.as_posix(), 'digest': key}
+                for key, file in zip(self.digest[room], files)
+            ]
+            for room, files in self.rooms.items()
+        }
+
+        content = json.dumps(index, indent=4).encode('utf-8')
+
+        replace(
+            self.cache.joinpath('index.json'),
+            lambda handle: handle.write(content)
+        )
+
+    def transform(self, n: int) -> dict[str, npt.NDArray]:
+        if n not in self.spectrum:
+            self.spectrum[n] = {
+                room: np.stack([
+                    self._fetch(
+                        f"{key}-{n}",
+                        lambda impulse=impulse: fft.rfft(impulse, n=n),
+                        mmap=True
+                    )
+                    for key, impulse in zip(self.digest[room], impulses)
+                ])
+                for room, impulses in self.impulse.items()
+            }
+
+        return self.spectrum[n]
+
+    def partition(self, block: int) -> dict[str, list[npt.NDArray]]:
+        if block not in self.partitioned:
+            self.partitioned[block] = {
+                room: [
+                    self._fetch(
+                        f"{key}-p{block}",
+                        lambda impulse=impulse: fft.rfft(
+                            np.reshape(
+                                np.pad(impulse, (0, -len(impulse) % block)),
+                                (-1, block)
+                            ),
+                            n=block * 2,
+                            axis=-1
+                        ),
+                        mmap=True
+                    )
+                    for key, impulse in zip(self.digest[room], impulses)
+                ]
+                for room, impulses in self.impulse.items()
+            }
+
+        return self.partitioned[block]
+
+
+def main() -> None:
+    dataset = Path.cwd().joinpath('dataset')
+
+    # Build the bank that online augmentation reads, without rendering
+    # the corpus
+    bank = Bank(rooms(dataset), dataset.joinpath('bank'))
+    bank.load()
+    bank.index()
+
+    for room, impulses in bank.impulse.items():
+        print(f"{room}: {len(impulses)} impulse responses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import math
+import numpy as np
+
+from scipy.signal import resample_poly
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from typing_extensions import Any
+
+
+MARKER = 'reverb:canonical'
+
+
+def statistics(signal: npt.NDArray) -> tuple[float, float]:
+    # The model normalizes over the whole clip, so the statistics of
+    # the whole source travel with the window that is kept
+    return float(np.mean(signal)), float(np.std(signal, ddof=1))
+
+
+def marker(settings: dict[str, Any], mean: float, deviation: float) -> str:
+    sample = settings.get('sample')
+    sample_rate = settings.get('sample_rate')
+
+    return (
+        f"{MARKER} rate={sample_rate} channels=1 sample={sample} "
+        f"mean={mean:.9g} deviation={deviation:.9g}"
+    )
+
+
+def marked(comment: str | None) -> bool:
+    if not comment or not comment.startswith(MARKER):
+        return False
+
+    field = [item.split('=', 1)[0] for item in comment.split()[1:]]
+
+    return 'mean' in field and 'deviation' in field
+
+
+def prepare(
+    signal: npt.NDArray,
+    rate: int,
+    settings: dict[str, Any]
+) -> tuple[npt.NDArray, int]:
+    sample = settings.get('sample')
+    sample_rate = settings.get('sample_rate')
+
+    if signal.ndim > 1:
+        signal = np.mean(signal, axis=1)
+
+    if rate != sample_rate:
+        # Only the analysis window survives, so resample just enough
+        # of the source to cover it
+        length = math.ceil(sample * rate / sample_rate) + rate // 100
+        signal = signal[:length]
+
+        gcd = math.gcd(rate, sample_rate)
+
+        signal = resample_poly(
+            signal,
+            sample_rate // gcd,
+            rate // gcd
+        )
+
+    signal = signal[:sample].astype(np.float32)
+
+    return signal, sample_rate
@@ -1,9 +1,81 @@
 from __future__ import annotations
 
+import canonical
+import json
+import os
 import soundfile as sf
+import struct
+import wav
 
+from multiprocessing import Pool
 from pathlib import Path
 from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Any
+
+
+def fresh(source: Path, destination: Path, settings: dict[str, Any]) -> bool:
+    if not destination.exists():
+        return False
+
+    if destination.stat().st_mtime < source.stat().st_mtime:
+        return False
+
+    # An output written in the other format is out of date as well
+    try:
+        comment = wav.info(destination).get('comment', '')
+    except (OSError, ValueError, struct.error):
+        return False
+
+    # A canonical file without the statistics of its source is rewritten
+    return canonical.marked(comment) == settings.get('canonical')
+
+
+def convert(task: tuple[Path, Path, dict[str, Any]]) -> tuple[Path, str | None]:
+    source, destination, settings = task
+
+    # Write beside the destination and rename, so an interrupted run
+    # never leaves a truncated file that looks up to date
+    temporary = destination.with_suffix('.tmp')
+
+    try:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        if settings.get('canonical'):
+            signal, rate = sf.read(source, dtype='float32')
+
+            mean, deviation = canonical.statistics(signal)
+            signal, rate = canonical.prepare(signal, rate, settings)
+
+            with sf.SoundFile(
+                temporary,
+                'w',
+                rate,
+                1,
+                subtype='PCM_16',
+                format='WAV'
+            ) as handle:
+                handle.comment = canonical.marker(settings, mean, deviation)
+                handle.write(signal)
+        else:
+            signal, rate = sf.read(source, dtype='int16')
+
+            sf.write(
+                temporary,
+                signal,
+                rate,
+                format='wav',
+                subtype='pcm_16'
+            )
+
+        os.replace(temporary, destination)
+    except Exception as exception:
+        temporary.unlink(missing_ok=True)
+        return source, str(exception)
+
+    return source, None
 
 
 def main() -> None:
@@ -13,26 +85,57 @@ def main() -> None:
     converted = dataset.joinpath('converted')
     converted.mkdir(parents=True, exist_ok=True)
 
+    # Write 16 kHz mono audio cut to the analysis window, marked so
+    # that the model transformation can skip resampling and mixdown
+    settings = {
+        'canonical': False,
+        'sample': 16000,
+        'sample_rate': 16000
+    }
+
     glob = original.glob('*/*/*/*.flac')
 
-    files = list(glob)
-    total = len(files)
+    tasks = [
+        (
+            file,
+            converted.joinpath(file.relative_to(original).with_suffix('.wav')),
+            settings
+        )
+        for file in glob
+    ]
 
-    for file in tqdm(files, total=total):
-        filename = file.relative_to(original).with_suffix('.wav')
+    pending = [
+        task
+        for task in tasks
+        if not fresh(*task)
+    ]
 
-        path = converted.joinpath(filename)
-        path.parent.mkdir(parents=True, exist_ok=True)
+    failed = {}
 
-        signal, rate = sf.read(file)
+    total = len(pending)
 
-        sf.write(
-            path,
-            signal,
-            rate,
-            format='wav',
-            subtype='pcm_16'
-        )
+    with Pool(os.cpu_count()) as pool:
+        results = pool.imap_unordered(convert, pending, chunksize=16)
+
+        for source, error in tqdm(results, total=total):
+            if error is not None:
+                failed[source.relative_to(original).as_posix()] = error
+
+    summary = {
+        'converted': total - len(failed),
+        'skipped': len(tasks) - total,
+        'failed': len(failed),
+        'errors': failed
+    }
+
+    with open(converted.joinpath('summary.json'), 'w') as handle:
+        json.dump(summary, handle, indent=4)
+
+    print(
+        f"converted: {summary['converted']}, "
+        f"skipped: {summary['skipped']}, "
+        f"failed: {summary['failed']}"
+    )
 
 
 if __name__ == '__main__':
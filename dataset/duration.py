@@ -1,6 +1,5 @@
 import numpy as np
-import struct
-import wave
+import wav
 
 from pathlib import Path
 from scipy.io import wavfile
@@ -31,26 +30,14 @@ def main() -> None:
     wavfile.write(padded_speech_path, sample_rate_speech, speech_signal_padded)
 
     # Create the reverb
-    reverb, header = create(padded_speech_path, sample_rir)
+    reverb, _ = create(padded_speech_path, sample_rir)
 
     # Trim the reverb to match the original length
     reverb = reverb[:len(speech_signal)]
 
-    path = Path.cwd().joinpath('rendered.wav').as_posix()
+    path = Path.cwd().joinpath('rendered.wav')
 
-    wav = wave.open(path, 'w')
-    wav.setparams(header)
-
-    length = len(reverb)
-
-    wav.writeframes(
-        struct.pack(
-            f"{length}h",
-            *reverb
-        )
-    )
-
-    wav.close()
+    wav.write(path, reverb, sample_rate_speech)
 
 if __name__ == '__main__':
     main()
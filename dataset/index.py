@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import csv
+import soundfile as sf
+import struct
+import wav
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Any
+
+
+FIELDS = ['path', 'label', 'frames', 'rate', 'channels', 'size', 'mtime']
+NUMERIC = ['frames', 'rate', 'channels', 'size', 'mtime']
+
+
+def header(path: Path) -> dict[str, int]:
+    if path.suffix.lower() == '.wav':
+        metadata = wav.info(path)
+
+        return {
+            'frames': metadata['nframes'],
+            'rate': metadata['rate'],
+            'channels': metadata['nchannels']
+        }
+
+    metadata = sf.info(path)
+
+    return {
+        'frames': metadata.frames,
+        'rate': metadata.samplerate,
+        'channels': metadata.channels
+    }
+
+
+def describe(
+    root: Path,
+    file: Path,
+    previous: dict[str, Any] | None
+) -> dict[str, Any] | None:
+    stat = file.stat()
+
+    # An unchanged file keeps its row without its header being read
+    if (
+        previous is not None and
+        previous['size'] == stat.st_size and
+        previous['mtime'] == stat.st_mtime_ns
+    ):
+        return previous
+
+    relative = file.relative_to(root)
+
+    try:
+        metadata = header(file)
+    except (OSError, ValueError, RuntimeError, struct.error):
+        return None
+
+    return {
+        'path': relative.as_posix(),
+        'label': relative.parts[0],
+        **metadata,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns
+    }
+
+
+def load(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+
+    with open(path, 'r', newline='') as handle:
+        rows = list(csv.DictReader(handle))
+
+    for row in rows:
+        for field in NUMERIC:
+            row[field] = int(row[field])
+
+    return {row['path']: row for row in rows}
+
+
+def build(root: Path, pattern: str, workers: int = 32) -> list[dict[str, Any]]:
+    path = root.joinpath('index.csv')
+    previous = load(path)
+
+    files = sorted(root.glob(pattern))
+    total = len(files)
+
+    with ThreadPoolExecutor(workers) as executor:
+        results = executor.map(
+            lambda file: describe(
+                root,
+                file,
+                previous.get(file.relative_to(root).as_posix())
+            ),
+            files
+        )
+
+        rows = [
+            row
+            for row in tqdm(results, total=total)
+            if row is not None
+        ]
+
+    temporary = path.with_suffix('.tmp')
+
+    with open(temporary, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    temporary.replace(path)
+
+    return rows
+
+
+def main() -> None:
+    dataset = Path.cwd().joinpath('dataset')
+
+    # The rooms that model/main.py trains on, which it reads from this
+    # index when there is no annotation.csv
+    corpus = {
+        dataset.joinpath('converted'): '*/*/*/*.wav',
+        dataset.joinpath('original'): '*/*/*/*.flac',
+        dataset.joinpath('render'): '*/*.wav',
+        Path.cwd().joinpath('rirs'): '*/*.wav'
+    }
+
+    for root, pattern in corpus.items():
+        if not root.exists():
+            continue
+
+        rows = build(root, pattern)
+        print(f"{root.name}: {len(rows)} files")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import os
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+class Manifest():
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.complete = set()
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.complete
+
+    def __len__(self) -> int:
+        return len(self.complete)
+
+    def load(self) -> set[str]:
+        if self.path.exists():
+            with open(self.path, 'r') as handle:
+                self.complete = {
+                    line.strip()
+                    for line in handle
+                    if line.strip()
+                }
+
+        return self.complete
+
+    def update(self, items: Iterable[str]) -> None:
+        items = [item for item in items if item not in self.complete]
+
+        if not items:
+            return
+
+        with open(self.path, 'a') as handle:
+            for item in items:
+                handle.write(f"{item}\n")
+
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        self.complete.update(items)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import csv
+import numpy as np
+import os
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from pathlib import Path
+    from types import TracebackType
+    from typing_extensions import Self
+
+
+FIELDS = ['path', 'label', 'shard', 'offset', 'length', 'rate']
+
+
+class Writer():
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.entry = []
+        self.handle = None
+        self.offset = 0
+
+    def __enter__(self) -> Self:
+        self.entry = []
+        self.offset = 0
+
+        temporary = self.path.with_suffix('.tmp')
+        self.handle = open(temporary, 'wb')
+
+        return self
+
+    def __exit__(
+        self,
+        kind: type[BaseException] | None,
+        exception: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        temporary = self.path.with_suffix('.tmp')
+        self.handle.close()
+
+        if kind is not None:
+            temporary.unlink(missing_ok=True)
+            return
+
+        os.replace(temporary, self.path)
+
+        with open(self.path.with_suffix('.csv'), 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(self.entry)
+
+    def add(self, path: str, label: str, signal: npt.NDArray, rate: int) -> None:
+        signal = np.ascontiguousarray(signal, dtype='<i2')
+        self.handle.write(signal)
+
+        self.entry.append({
+            'path': path,
+            'label': label,
+            'shard': self.path.name,
+            'offset': self.offset,
+            'length': len(signal),
+            'rate': rate
+        })
+
+        self.offset = self.offset + len(signal)
+
+
+def merge(path: Path) -> int:
+    total = 0
+
+    with open(path.joinpath('index.csv'), 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDS)
+        writer.writeheader()
+
+        for file in sorted(path.glob('*.csv')):
+            if file.name == 'index.csv':
+                continue
+
+            with open(file, 'r', newline='') as shard:
+                rows = list(csv.DictReader(shard))
+
+            writer.writerows(rows)
+            total = total + len(rows)
+
+    return total
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import canonical
+import hashlib
 import numpy as np
-import struct
-import wave
-
+import os
+import stream
+import wav
+
+from bank import Bank, rooms
+from contextlib import nullcontext
+from manifest import Manifest
+from multiprocessing import Pool
+from pack import Writer, merge
 from pathlib import Path
-from scipy.signal import convolve
-from secrets import SystemRandom
+from scipy import fft
 from tqdm import tqdm
 from typing import TYPE_CHECKING
 
@@ -16,176 +23,293 @@ if TYPE_CHECKING:
     from typing_extensions import Any
 
 
-def create(sin: Path, rin: Path) -> tuple[npt.NDArray, tuple[Any, Any]]:
-    sin = sin.as_posix()
-    rin = rin.as_posix()
+def size(length: int) -> int:
+    return 1 << (length - 1).bit_length()
+
 
-    # Get information about the source file
-    file = wave.open(sin, 'r')
-    rate = file.getframerate()
-    nsample_source = file.getnframes()
-    frames_source = file.readframes(nsample_source)
-    file.close()
+def render(
+    source: npt.NDArray,
+    bank: Bank,
+    choice: dict[str, int]
+) -> dict[str, npt.NDArray]:
+    lengths = [
+        len(source) + len(bank.impulse[room][index]) - 1
+        for room, index in choice.items()
+    ]
 
-    # Get information about the room impulse response
-    file = wave.open(rin, 'r')
-    nsample_reverb = file.getnframes()
-    frames_reverb = file.readframes(nsample_reverb)
-    file.close()
+    longest = max(lengths)
+    n = size(longest)
 
-    maximum = np.iinfo(np.int16).max
+    spectrum = bank.transform(n)
 
-    # Unpack the source file
-    source = struct.unpack(
-        f"{nsample_source}h",
-        frames_source
+    # Stack the pre-transformed room impulse responses
+    response = np.stack([
+        spectrum[room][index]
+        for room, index in choice.items()
+    ])
+
+    # Convolve every room in a single pass
+    output = fft.irfft(
+        fft.rfft(source, n=n) * response,
+        n=n,
+        axis=-1
     )
 
-    source = np.array(source, dtype=np.float64)
-    source = source / maximum
+    output = output[:, :longest]
 
-    # Unpack the room impulse response
-    reverb = struct.unpack(
-        f"{nsample_reverb}h",
-        frames_reverb
+    peak = np.max(
+        np.abs(output),
+        axis=-1,
+        keepdims=True
     )
 
-    reverb = np.array(reverb, dtype=np.float64)
-    reverb = reverb / maximum
+    peak[peak == 0] = 1
 
-    gain = 1
+    maximum = np.iinfo(np.int16).max
 
-    # Convolve
-    output = convolve(source, reverb, mode='full') * gain
+    output = output / peak
+    output = output * int(maximum)
+    output = output.astype(np.int16)
 
-    output = output / np.max(
-        np.abs(output)
-    )
+    return {
+        room: output[i, :length]
+        for i, (room, length) in enumerate(zip(choice, lengths))
+    }
 
-    render = output * int(maximum)
-    render = render.astype(np.int16)
 
-    nframes = len(render)
-    comptype = 'NONE'
-    compname = 'not compressed'
-    nchannels = 1
-    sampwidth = 2
+def create(sin: Path, rin: Path) -> tuple[npt.NDArray, tuple[Any, ...]]:
+    source, rate = wav.load(sin)
+
+    bank = Bank({'room': [rin]})
+    bank.load()
+
+    output = render(source, bank, {'room': 0})
+    reverb = output['room']
+
+    return reverb, wav.header(rate, len(reverb))
+
+
+def prepare(
+    reverb: npt.NDArray,
+    rate: int,
+    settings: dict[str, Any]
+) -> tuple[npt.NDArray, int, str]:
+    # The whole recording is rendered, so the statistics in the marker
+    # are those of the clip the model would otherwise normalize over
+    maximum = np.iinfo(np.int16).max
+
+    signal = reverb / (maximum + 1)
 
-    header = (
-        nchannels,
-        sampwidth,
+    mean, deviation = canonical.statistics(signal)
+    signal, rate = canonical.prepare(signal, rate, settings)
+
+    signal = np.clip(signal * (maximum + 1), -maximum - 1, maximum)
+
+    return (
+        signal.astype(np.int16),
         rate,
-        nframes,
-        comptype,
-        compname
+        canonical.marker(settings, mean, deviation)
     )
 
-    return render, header
 
+class State():
+    def __init__(self):
+        self.bank = None
+        self.settings = None
 
-def main() -> None:
-    dataset = Path.cwd().joinpath('dataset')
-    path = dataset.joinpath('render')
 
-    speech_small = path.joinpath('small')
-    speech_small.mkdir(exist_ok=True, parents=True)
+# The bank and the settings of a pool worker, set by initialize
+_state = State()
 
-    speech_medium = path.joinpath('medium')
-    speech_medium.mkdir(exist_ok=True, parents=True)
 
-    speech_large = path.joinpath('large')
-    speech_large.mkdir(exist_ok=True, parents=True)
+def stable(name: str) -> int:
+    # The built-in hash of a string differs between processes
+    key = hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(key, 'little')
 
-    speech = [
-        file
-        for file in dataset.joinpath('converted/train-clean-100').glob('*/*/*.wav')
-        if file.is_file()
-    ]
 
-    rir_small = [
-        file
-        for file in dataset.joinpath('original/rir/smallroom').glob('*/*.wav')
-        if file.is_file()
+def shard(files: list[Path], length: int) -> list[list[Path]]:
+    return [
+        files[i:i + length]
+        for i in range(0, len(files), length)
     ]
 
-    rir_medium = [
-        file
-        for file in dataset.joinpath('original/rir/mediumroom').glob('*/*.wav')
-        if file.is_file()
-    ]
 
-    rir_large = [
-        file
-        for file in dataset.joinpath('original/rir/largeroom').glob('*/*.wav')
-        if file.is_file()
-    ]
+def initialize(
+    rir: dict[str, list[Path]],
+    settings: dict[str, Any],
+    digests: dict[str, list[str]] | None = None
+) -> None:
+    _state.bank = Bank(rir, settings.get('cache'))
+    _state.bank.load(digests)
+
+    _state.settings = settings
+
+
+def process(task: tuple[int, list[Path], set[str]]) -> list[str]:
+    index, files, complete = task
 
-    generator = SystemRandom()
+    bank, settings = _state.bank, _state.settings
 
-    total = len(speech)
+    seed = settings.get('seed')
+    destination = settings.get('destination')
+    packed = settings.get('format') == 'pack'
+    prepared = settings.get('canonical')
 
-    for file in tqdm(speech, total=total):
-        small = generator.sample(rir_small, 1)
-        medium = generator.sample(rir_medium, 1)
-        large = generator.sample(rir_large, 1)
+    if packed:
+        # A packed shard is only ever written as a whole
+        complete = set()
 
-        for s, m, l in zip(small, medium, large):
-            # Small
-            reverb, header = create(file, s)
+        path = settings.get('pack').joinpath(f"{index:05d}.bin")
+        writer = Writer(path)
+    else:
+        writer = nullcontext()
 
-            path = speech_small.joinpath(file.name).as_posix()
+    finished = []
 
-            wav = wave.open(path, 'w')
-            wav.setparams(header)
+    with writer:
+        for file in files:
+            if file.name in complete:
+                continue
 
-            length = len(reverb)
+            # Every file draws from its own stream, so the choice of room
+            # impulse response depends on neither the worker, the shard
+            # nor a resume
+            generator = np.random.default_rng([seed, stable(file.name)])
 
-            wav.writeframes(
-                struct.pack(
-                    f"{length}h",
-                    *reverb
-                )
-            )
+            choice = {
+                name: int(generator.integers(len(impulse)))
+                for name, impulse in bank.impulse.items()
+            }
 
-            wav.close()
+            # Long recordings are convolved block by block, so memory
+            # does not grow with their length
+            nframes = wav.info(file)['nframes']
 
-            # Medium
-            reverb, header = create(file, m)
+            if not packed and not prepared and nframes > settings.get('stream'):
+                path = {
+                    name: destination[name].joinpath(file.name)
+                    for name in choice
+                }
 
-            path = speech_medium.joinpath(file.name).as_posix()
+                stream.render(file, bank, choice, path, settings.get('block'))
+                finished.append(file.name)
 
-            wav = wave.open(path, 'w')
-            wav.setparams(header)
+                continue
 
-            length = len(reverb)
+            source, rate = wav.load(file)
 
-            wav.writeframes(
-                struct.pack(
-                    f"{length}h",
-                    *reverb
-                )
-            )
+            output = render(source, bank, choice)
 
-            wav.close()
+            for name, reverb in output.items():
+                comment = None
+                target = rate
 
-            # Large
-            reverb, header = create(file, l)
+                if prepared:
+                    reverb, target, comment = prepare(reverb, rate, settings)
+
+                if packed:
+                    writer.add(f"{name}/{file.name}", name, reverb, target)
+                else:
+                    path = destination[name].joinpath(file.name)
+                    wav.write(path, reverb, target, comment)
+
+            finished.append(file.name)
+
+    return finished
+
+
+def main() -> None:
+    dataset = Path.cwd().joinpath('dataset')
+    path = dataset.joinpath('render')
+
+    room = ['small', 'medium', 'large']
+
+    destination = {
+        name: path.joinpath(name)
+        for name in room
+    }
+
+    pack = path.joinpath('pack')
+
+    speech = sorted(
+        file
+        for file in dataset.joinpath('converted/train-clean-100').glob('*/*/*.wav')
+        if file.is_file()
+    )
+
+    rir = rooms(dataset)
+
+    settings = {
+        'block': 8192,
+        'cache': dataset.joinpath('bank'),
+        'canonical': False,
+        'destination': destination,
+        'format': 'wav',
+        'pack': pack,
+        'sample': 16000,
+        'sample_rate': 16000,
+        'seed': 1220,
+        'shard': 64,
+        'stream': 16000 * 60,
+        'workers': os.cpu_count()
+    }
+
+    if settings.get('format') == 'pack':
+        directories = [pack]
+        manifest = Manifest(pack.joinpath('manifest.txt'))
+    else:
+        directories = destination.values()
+        manifest = Manifest(path.joinpath('manifest.txt'))
+
+    for directory in directories:
+        directory.mkdir(exist_ok=True, parents=True)
+
+    # Hash the bank, populate the cache and write its index once, before
+    # the workers start
+    bank = Bank(rir, settings.get('cache'))
+    bank.load()
+    bank.index()
+
+    digests = bank.digest
+
+    complete = manifest.load()
+
+    tasks = [
+        (index, files, {file.name for file in files} & complete)
+        for index, files in enumerate(
+            shard(speech, settings.get('shard'))
+        )
+    ]
+
+    tasks = [
+        task
+        for task in tasks
+        if len(task[2]) < len(task[1])
+    ]
 
-            path = speech_large.joinpath(file.name).as_posix()
+    total = len(tasks)
+    workers = settings.get('workers')
 
-            wav = wave.open(path, 'w')
-            wav.setparams(header)
+    if workers == 1:
+        initialize(rir, settings, digests)
+        results = map(process, tasks)
 
-            length = len(reverb)
+        for finished in tqdm(results, total=total):
+            manifest.update(finished)
+    else:
+        with Pool(
+            workers,
+            initializer=initialize,
+            initargs=(rir, settings, digests)
+        ) as pool:
+            results = pool.imap_unordered(process, tasks)
 
-            wav.writeframes(
-                struct.pack(
-                    f"{length}h",
-                    *reverb
-                )
-            )
+            for finished in tqdm(results, total=total):
+                manifest.update(finished)
 
-            wav.close()
+    if settings.get('format') == 'pack':
+        merge(pack)
 
 
 if __name__ == '__main__':
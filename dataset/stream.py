@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import numpy as np
+import wav
+import wave
+
+from scipy import fft
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from bank import Bank
+    from pathlib import Path
+
+
+class Convolver():
+    def __init__(self, partition: npt.NDArray, block: int):
+        self.block = block
+        self.partition = partition
+        self.delay = np.zeros(partition.shape, dtype=np.complex64)
+        self.overlap = np.zeros(block, dtype=np.float32)
+        self.position = 0
+
+    def process(self, signal: npt.NDArray) -> npt.NDArray:
+        count = len(self.partition)
+
+        # The frequency-domain delay line holds the spectra of the last
+        # `count` input blocks, newest at `position`
+        self.position = (self.position + 1) % count
+        self.delay[self.position] = fft.rfft(signal, n=self.block * 2)
+
+        order = (self.position - np.arange(count)) % count
+
+        spectrum = np.sum(
+            self.delay * self.partition[order],
+            axis=0
+        )
+
+        output = fft.irfft(spectrum, n=self.block * 2)
+
+        result = output[:self.block] + self.overlap
+        self.overlap = output[self.block:]
+
+        return result
+
+
+def render(
+    source: Path,
+    bank: Bank,
+    choice: dict[str, int],
+    destination: dict[str, Path],
+    block: int = 8192
+) -> None:
+    metadata = wav.info(source)
+    rate = metadata['rate']
+    nframes = metadata['nframes']
+
+    partition = bank.partition(block)
+
+    convolver = {
+        room: Convolver(partition[room][index], block)
+        for room, index in choice.items()
+    }
+
+    remaining = {
+        room: nframes + len(bank.impulse[room][index]) - 1
+        for room, index in choice.items()
+    }
+
+    peak = dict.fromkeys(choice, 0.0)
+
+    scratch = {
+        room: destination[room].with_suffix('.f32')
+        for room in choice
+    }
+
+    maximum = np.iinfo(np.int16).max
+
+    handle = {
+        room: open(path, 'wb')
+        for room, path in scratch.items()
+    }
+
+    try:
+        reader = wav.blocks(source, block)
+
+        # First pass: convolve block by block, keeping the running peak
+        # and spilling the unscaled output to disk
+        while any(remaining.values()):
+            signal = next(reader, None)
+
+            if signal is None:
+                signal = np.zeros(block, dtype=np.float32)
+            else:
+                signal = signal.astype(np.float32) / maximum
+
+            for room in choice:
+                if remaining[room] == 0:
+                    continue
+
+                output = convolver[room].process(signal)
+                output = output[:remaining[room]].astype(np.float32)
+
+                remaining[room] = remaining[room] - len(output)
+
+                peak[room] = max(
+                    peak[room],
+                    float(np.max(np.abs(output)))
+                )
+
+                handle[room].write(output)
+
+        for file in handle.values():
+            file.close()
+
+        # Second pass: rescale the spilled output into the destination
+        for room, path in scratch.items():
+            scale = maximum / (peak[room] or 1)
+
+            with wave.open(destination[room].as_posix(), 'w') as writer:
+                writer.setparams(
+                    wav.header(rate, 0)
+                )
+
+                output = np.memmap(path, dtype=np.float32, mode='r')
+
+                for i in range(0, len(output), block):
+                    chunk = output[i:i + block] * scale
+                    writer.writeframes(chunk.astype('<i2'))
+
+                del output
+    finally:
+        for room, path in scratch.items():
+            handle[room].close()
+            path.unlink(missing_ok=True)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import numpy as np
+import struct
+import wave
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from collections.abc import Iterator
+    from pathlib import Path
+    from typing_extensions import Any
+
+
+def header(rate: int, nframes: int, nchannels: int = 1) -> tuple[Any, ...]:
+    comptype = 'NONE'
+    compname = 'not compressed'
+    sampwidth = 2
+
+    return (
+        nchannels,
+        sampwidth,
+        rate,
+        nframes,
+        comptype,
+        compname
+    )
+
+
+def tags(chunk: bytes) -> dict[str, str]:
+    metadata = {}
+
+    if chunk[:4] != b'INFO':
+        return metadata
+
+    position = 4
+
+    while position + 8 <= len(chunk):
+        name, size = struct.unpack('<4sI', chunk[position:position + 8])
+        value = chunk[position + 8:position + 8 + size]
+
+        if name == b'ICMT':
+            metadata['comment'] = value.rstrip(b'\0').decode('utf-8', 'replace')
+
+        position = position + 8 + size + (size & 1)
+
+    return metadata
+
+
+def info(path: Path) -> dict[str, Any]:
+    metadata = {}
+
+    with open(path, 'rb') as handle:
+        riff, _, identifier = struct.unpack('<4sI4s', handle.read(12))
+
+        if riff != b'RIFF' or identifier != b'WAVE':
+            message = f"{path} is not a RIFF/WAVE file"
+            raise ValueError(message)
+
+        while True:
+            chunk = handle.read(8)
+
+            if len(chunk) < 8:
+                break
+
+            name, size = struct.unpack('<4sI', chunk)
+            position = handle.tell()
+
+            if name == b'fmt ':
+                (
+                    _,
+                    metadata['nchannels'],
+                    metadata['rate'],
+                    _,
+                    _,
+                    bits
+                ) = struct.unpack('<HHIIHH', handle.read(16))
+
+                metadata['sampwidth'] = bits // 8
+
+            if name == b'data':
+                metadata['offset'] = position
+                metadata['size'] = size
+
+            if name == b'LIST':
+                metadata.update(
+                    tags(handle.read(size))
+                )
+
+            handle.seek(position + size + (size & 1))
+
+    if 'offset' not in metadata or 'rate' not in metadata:
+        message = f"{path} is missing a fmt or data chunk"
+        raise ValueError(message)
+
+    metadata['nframes'] = (
+        metadata['size'] //
+        (metadata['sampwidth'] * metadata['nchannels'])
+    )
+
+    return metadata
+
+
+def read(path: Path, mmap: bool = False) -> tuple[npt.NDArray, int]:
+    metadata = info(path)
+
+    if metadata['sampwidth'] != 2:
+        message = f"{path} is not 16-bit PCM"
+        raise ValueError(message)
+
+    nchannels = metadata['nchannels']
+    nframes = metadata['nframes']
+
+    if mmap:
+        signal = np.memmap(
+            path,
+            dtype='<i2',
+            mode='r',
+            offset=metadata['offset'],
+            shape=(nframes * nchannels,)
+        )
+    else:
+        signal = np.empty(nframes * nchannels, dtype='<i2')
+
+        with open(path, 'rb') as handle:
+            handle.seek(metadata['offset'])
+            count = handle.readinto(signal)
+
+        if count != signal.nbytes:
+            message = f"{path} is truncated"
+            raise ValueError(message)
+
+    if nchannels > 1:
+        signal = signal.reshape(nframes, nchannels)
+
+    return signal, metadata['rate']
+
+
+def blocks(path: Path, size: int) -> Iterator[npt.NDArray]:
+    metadata = info(path)
+
+    if metadata['sampwidth'] != 2 or metadata['nchannels'] != 1:
+        message = f"{path} is not mono 16-bit PCM"
+        raise ValueError(message)
+
+    remaining = metadata['nframes']
+
+    with open(path, 'rb') as handle:
+        handle.seek(metadata['offset'])
+
+        while remaining > 0:
+            signal = np.empty(min(size, remaining), dtype='<i2')
+            count = handle.readinto(signal)
+
+            if count != signal.nbytes:
+                message = f"{path} is truncated"
+                raise ValueError(message)
+
+            remaining = remaining - len(signal)
+
+            yield signal
+
+
+def load(path: Path) -> tuple[npt.NDArray, int]:
+    signal, rate = read(path)
+
+    maximum = np.iinfo(np.int16).max
+
+    signal = signal.astype(np.float32)
+    signal /= maximum
+
+    return signal, rate
+
+
+def write(
+    path: Path,
+    signal: npt.NDArray,
+    rate: int,
+    comment: str | None = None
+) -> None:
+    signal = np.ascontiguousarray(signal, dtype='<i2')
+
+    nchannels = 1 if signal.ndim == 1 else signal.shape[1]
+
+    with wave.open(path.as_posix(), 'w') as wav:
+        wav.setparams(
+            header(rate, len(signal), nchannels)
+        )
+
+        wav.writeframes(signal)
+
+    if comment is not None:
+        annotate(path, comment)
+
+
+def annotate(path: Path, comment: str) -> None:
+    value = comment.encode('utf-8') + b'\0'
+    value = value + b'\0' * (len(value) & 1)
+
+    chunk = b'INFO' + struct.pack('<4sI', b'ICMT', len(value)) + value
+
+    with open(path, 'r+b') as handle:
+        handle.seek(0, 2)
+        handle.write(struct.pack('<4sI', b'LIST', len(chunk)) + chunk)
+
+        size = handle.tell() - 8
+
+        handle.seek(4)
+        handle.write(struct.pack('<I', size))
@@ -145,7 +145,7 @@ class Window(QMainWindow):
         self.predictor = Predictor()
         self.predictor.annotation = self.annotation
         self.predictor.mapping = self.mapping
-        self.predictor.model = self.model
+        self.predictor.model = self.model.optimize_for_inference()
 
     def on_click_load(self) -> None:
         dialog = QFileDialog()
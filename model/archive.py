@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import io
+import json
+import numpy as np
+import soundfile as sf
+import tarfile
+import torch
+
+from pathlib import Path
+from torch.utils.data import IterableDataset, get_worker_info
+from typing import TYPE_CHECKING
+from urllib.request import urlopen
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from typing import BinaryIO
+
+
+class ArchiveDataset(IterableDataset):
+    def __init__(
+        self,
+        location: str | Path | None = None,
+        buffer: int = 1000,
+        device: str | torch.device | None = None,
+        seed: int = 0,
+        shuffle: bool = True,
+        transformation: Callable | None = None
+    ):
+        self.mapping = {
+            'large': 0,
+            'medium': 1,
+            'small': 2
+        }
+
+        self.location = str(location)
+        self.buffer = buffer
+        self.device = device
+        self.seed = seed
+        self.shuffle = shuffle
+        self.transformation = transformation
+        self.epoch = 0
+
+        with self._open('index.json') as handle:
+            index = json.load(handle)
+
+        self.count = index['count']
+        self.shards = [shard['name'] for shard in index['shards']]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _open(self, name: str) -> BinaryIO:
+        # A shard is read front to back, so a file and an HTTP mirror
+        # are both served as one sequential stream
+        if self.location.startswith(('http://', 'https://')):
+            return urlopen(f"{self.location.rstrip('/')}/{name}")
+
+        return open(Path(self.location).joinpath(name), 'rb')
+
+    def _split(self) -> list[str]:
+        generator = np.random.default_rng([self.seed, self.epoch])
+        self.epoch = self.epoch + 1
+
+        shards = list(self.shards)
+
+        if self.shuffle:
+            shards = [shards[i] for i in generator.permutation(len(shards))]
+
+        # Every worker streams its own shards, so no sample is repeated
+        information = get_worker_info()
+
+        if information is None:
+            return shards
+
+        return shards[information.id::information.num_workers]
+
+    def _samples(self, shards: list[str]) -> Iterator[dict[str, bytes]]:
+        for shard in shards:
+            with self._open(shard) as handle:
+                with tarfile.open(fileobj=handle, mode='r|') as archive:
+                    key, sample = None, {}
+
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+
+                        name, _, extension = member.name.rpartition('.')
+
+                        if name != key:
+                            if sample:
+                                yield sample
+
+                            key, sample = name, {}
+
+                        sample[extension] = archive.extractfile(member).read()
+
+                    if sample:
+                        yield sample
+
+    def _decode(self, sample: dict[str, bytes]) -> tuple[torch.Tensor, int]:
+        with sf.SoundFile(io.BytesIO(sample['wav'])) as handle:
+            signal = handle.read(dtype='float32', always_2d=True)
+            rate = handle.samplerate
+            comment = handle.comment or None
+
+        signal = torch.from_numpy(signal.T).to(self.device)
+        signal = self.transformation(signal, rate, comment)
+
+        label = self.mapping[sample['cls'].decode('utf-8')]
+
+        return signal, label
+
+    def __iter__(self) -> Iterator[tuple[torch.Tensor, int]]:
+        shards = self._split()
+
+        information = get_worker_info()
+        worker = 0 if information is None else information.id + 1
+
+        generator = np.random.default_rng([self.seed, self.epoch, worker])
+
+        if not self.shuffle:
+            for sample in self._samples(shards):
+                yield self._decode(sample)
+
+            return
+
+        # A bounded buffer of undecoded samples, from which a random one
+        # is taken each time another arrives
+        buffer = []
+
+        for sample in self._samples(shards):
+            if len(buffer) < self.buffer:
+                buffer.append(sample)
+                continue
+
+            i = generator.integers(len(buffer))
+            buffer[i], sample = sample, buffer[i]
+
+            yield self._decode(sample)
+
+        generator.shuffle(buffer)
+
+        for sample in buffer:
+            yield self._decode(sample)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import soundfile as sf
+import torch
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def load(
+    path: Path,
+    start: int = 0,
+    frames: int = -1
+) -> tuple[torch.Tensor, int, str | None]:
+    # Decode and read the header comment from a single open, so the
+    # canonical marker costs no extra file access
+    with sf.SoundFile(path) as handle:
+        if start > 0:
+            handle.seek(start)
+
+        signal = handle.read(frames, dtype='float32', always_2d=True)
+        rate = handle.samplerate
+        comment = handle.comment or None
+
+    signal = torch.from_numpy(signal.T)
+
+    return signal, rate, comment
+
+
+def info(path: Path) -> tuple[int, int]:
+    metadata = sf.info(path)
+    return metadata.frames, metadata.samplerate
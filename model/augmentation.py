@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import numpy as np
+import torch
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing_extensions import Self
+
+
+def size(length: int) -> int:
+    return 1 << (length - 1).bit_length()
+
+
+class Reverberation():
+    def __init__(self, impulse: dict[str, list[torch.Tensor]] | None = None):
+        self.impulse = impulse
+        self.spectrum = {}
+
+    @classmethod
+    def from_bank(cls: type[Self], path: Path) -> Self:
+        with open(path.joinpath('index.json'), 'r') as handle:
+            index = json.load(handle)
+
+        impulse = {
+            room: [
+                torch.from_numpy(
+                    np.load(path.joinpath(f"{entry['digest']}.npy"))
+                )
+                for entry in entries
+            ]
+            for room, entries in index.items()
+        }
+
+        return cls(impulse)
+
+    def _transform(self, room: str, n: int, length: int) -> torch.Tensor:
+        key = (room, n, length)
+
+        if key not in self.spectrum:
+            self.spectrum[key] = torch.stack([
+                torch.fft.rfft(impulse[:length], n=n)
+                for impulse in self.impulse[room]
+            ])
+
+        return self.spectrum[key]
+
+    def __call__(
+        self,
+        signal: torch.Tensor,
+        room: str,
+        length: int | None = None
+    ) -> torch.Tensor:
+        if length is None:
+            longest = max(len(impulse) for impulse in self.impulse[room])
+            length = signal.shape[-1] + longest - 1
+
+        # The first `length` output samples only depend on the first
+        # `length` samples of the source and of the impulse response
+        signal = signal[..., :length]
+
+        n = size(signal.shape[-1] + length - 1)
+        spectrum = self._transform(room, n, length)
+
+        index = torch.randint(len(spectrum), (1,)).item()
+
+        output = torch.fft.irfft(
+            torch.fft.rfft(signal, n=n) * spectrum[index],
+            n=n
+        )
+
+        output = output[..., :length]
+
+        peak = output.abs().max()
+
+        if peak > 0:
+            output = output / peak
+
+        return output
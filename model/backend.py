@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import math
+import numpy as np
+
+from scipy.signal import resample_poly
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+    import torch
+
+    from model.model import Model
+    from pathlib import Path
+    from typing_extensions import Any
+
+
+class TorchBackend():
+    def __init__(
+        self,
+        model: Model | torch.nn.Module = None,
+        settings: dict[str, Any] | None = None,
+        device: str | torch.device = 'cpu'
+    ):
+        # torch is imported here rather than at the top, so a process
+        # that runs the ONNX backend never pays for it
+        import torch
+
+        from model.transformation import Transformation
+
+        self.device = device
+        self.model = model
+        self.settings = settings
+
+        self.transformation = Transformation(
+            device=device,
+            settings=settings
+        )
+
+        self._torch = torch
+
+    def __call__(
+        self,
+        signal: npt.NDArray,
+        rate: int
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        torch = self._torch
+
+        signal = torch.from_numpy(signal).to(self.device)
+
+        with torch.no_grad():
+            feature = self.transformation(signal, rate)
+            feature = feature.unsqueeze(0)
+
+            probability = self.model(feature)
+
+        return probability.cpu().numpy(), feature.cpu().numpy()
+
+
+class OnnxBackend():
+    def __init__(
+        self,
+        path: Path | None = None,
+        settings: dict[str, Any] | None = None
+    ):
+        import onnxruntime
+
+        self.path = path
+        self.settings = settings
+
+        self.session = onnxruntime.InferenceSession(
+            str(path),
+            providers=['CPUExecutionProvider']
+        )
+
+    def _resample(self, signal: npt.NDArray, rate: int) -> npt.NDArray:
+        target = self.settings.get('sample_rate')
+
+        if rate == target:
+            return signal
+
+        gcd = math.gcd(rate, target)
+
+        return resample_poly(signal, target // gcd, rate // gcd, axis=1)
+
+    def __call__(
+        self,
+        signal: npt.NDArray,
+        rate: int
+    ) -> tuple[npt.NDArray, npt.NDArray]:
+        # Normalized before resampling, like Transformation.waveform
+        signal = (signal - signal.mean()) / signal.std(ddof=1)
+
+        signal = self._resample(signal, rate)
+        signal = np.ascontiguousarray(signal, dtype=np.float32)
+
+        probability, feature = self.session.run(None, {'signal': signal})
+
+        return probability, feature
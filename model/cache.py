@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import math
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+import torch
+import weakref
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Any
+
+
+# The positions in the shared counter
+HITS, MISSES, EVICTIONS, FREE, HIGH, HEAD, TAIL, ITEMS = range(8)
+
+# The tables that every process shares
+TABLES = ['counter', 'first', 'following', 'free', 'newer', 'older', 'size']
+
+
+def _remove(path: str, owner: int) -> None:
+    # Forked loader workers inherit the finalizer, but only the process
+    # that created the file removes it
+    if os.getpid() == owner:
+        os.unlink(path)
+
+
+class WaveformCache():
+    def __init__(
+        self,
+        budget: int = 2 ** 30,
+        length: int = 0,
+        page: int = 4096,
+        path: Path | None = None
+    ):
+        self.budget = budget
+        self.length = length
+        self.page = page
+
+        self.count = budget // (page * 4)
+
+        # The pages live in a sparse file in shared memory, where there
+        # is one, so only the pages that are written take memory
+        if path is None and os.path.isdir('/dev/shm'):
+            path = Path('/dev/shm')
+
+        handle, self.path = tempfile.mkstemp(
+            dir=path,
+            prefix='waveform-',
+            suffix='.cache'
+        )
+
+        os.ftruncate(handle, self.count * page * 4)
+        os.close(handle)
+
+        weakref.finalize(self, _remove, self.path, os.getpid())
+
+        # The next page of each page of an item, and a stack of the
+        # pages that were freed by an eviction
+        self.following = torch.full((self.count,), -1, dtype=torch.int64)
+        self.free = torch.zeros(self.count, dtype=torch.int64)
+
+        # The first page and the number of samples of each item, or -1
+        # when it is absent, and its neighbours in the recency list
+        self.first = torch.full((length,), -1, dtype=torch.int64)
+        self.size = torch.zeros(length, dtype=torch.int64)
+        self.newer = torch.full((length,), -1, dtype=torch.int64)
+        self.older = torch.full((length,), -1, dtype=torch.int64)
+
+        self.counter = torch.zeros(8, dtype=torch.int64)
+        self.counter[HEAD] = -1
+        self.counter[TAIL] = -1
+
+        for name in TABLES:
+            getattr(self, name).share_memory_()
+
+        self.lock = multiprocessing.Lock()
+
+        self._storage = None
+        self._table = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Each worker maps the file and views the tables itself
+        state = self.__dict__.copy()
+        state['_storage'] = None
+        state['_table'] = None
+
+        return state
+
+    def _open(self) -> tuple[np.memmap, dict[str, np.ndarray]]:
+        if self._storage is None:
+            self._storage = np.memmap(
+                self.path,
+                dtype=np.float32,
+                mode='r+',
+                shape=(self.count, self.page)
+            )
+
+            # NumPy views of the shared tensors, for fast scalar access
+            self._table = {
+                name: getattr(self, name).numpy()
+                for name in TABLES
+            }
+
+        return self._storage, self._table
+
+    def _unlink(self, table: dict[str, np.ndarray], index: int) -> None:
+        counter, newer, older = table['counter'], table['newer'], table['older']
+
+        if newer[index] >= 0:
+            older[newer[index]] = older[index]
+        else:
+            counter[HEAD] = older[index]
+
+        if older[index] >= 0:
+            newer[older[index]] = newer[index]
+        else:
+            counter[TAIL] = newer[index]
+
+        newer[index] = -1
+        older[index] = -1
+
+    def _push(self, table: dict[str, np.ndarray], index: int) -> None:
+        counter, newer, older = table['counter'], table['newer'], table['older']
+
+        head = counter[HEAD]
+
+        older[index] = head
+        newer[index] = -1
+
+        if head >= 0:
+            newer[head] = index
+        else:
+            counter[TAIL] = index
+
+        counter[HEAD] = index
+
+    def _pages(self, table: dict[str, np.ndarray], index: int) -> list[int]:
+        following = table['following']
+
+        pages = []
+        page = table['first'][index]
+
+        while page >= 0:
+            pages.append(int(page))
+            page = following[page]
+
+        return pages
+
+    def _evict(self, table: dict[str, np.ndarray]) -> None:
+        counter, free = table['counter'], table['free']
+
+        victim = int(counter[TAIL])
+
+        # Only the pages of the least recently used item are touched
+        for page in self._pages(table, victim):
+            free[counter[FREE]] = page
+            counter[FREE] += 1
+
+        table['first'][victim] = -1
+        self._unlink(table, victim)
+
+        counter[ITEMS] -= 1
+        counter[EVICTIONS] += 1
+
+    def _allocate(self, table: dict[str, np.ndarray]) -> int:
+        counter = table['counter']
+
+        if counter[FREE] > 0:
+            counter[FREE] -= 1
+            return int(table['free'][counter[FREE]])
+
+        # A page that was never used before
+        page = int(counter[HIGH])
+        counter[HIGH] += 1
+
+        return page
+
+    def get(self, index: int) -> torch.Tensor | None:
+        storage, table = self._open()
+
+        with self.lock:
+            counter = table['counter']
+
+            if table['first'][index] < 0:
+                counter[MISSES] += 1
+                return None
+
+            counter[HITS] += 1
+
+            self._unlink(table, index)
+            self._push(table, index)
+
+            pages = self._pages(table, index)
+            size = int(table['size'][index])
+
+            signal = storage[pages].reshape(-1)[:size]
+
+        return torch.from_numpy(signal).unsqueeze(0)
+
+    def put(self, index: int, signal: torch.Tensor) -> None:
+        storage, table = self._open()
+
+        signal = signal.detach().flatten().float().cpu().numpy()
+
+        size = len(signal)
+        needed = max(math.ceil(size / self.page), 1)
+
+        if needed > self.count:
+            return
+
+        with self.lock:
+            counter = table['counter']
+
+            if table['first'][index] >= 0:
+                return
+
+            while counter[FREE] + self.count - counter[HIGH] < needed:
+                self._evict(table)
+
+            pages = [self._allocate(table) for _ in range(needed)]
+
+            for i, page in enumerate(pages):
+                chunk = signal[i * self.page:(i + 1) * self.page]
+                storage[page, :len(chunk)] = chunk
+
+                table['following'][page] = pages[i + 1] if i + 1 < needed else -1
+
+            table['first'][index] = pages[0]
+            table['size'][index] = size
+
+            self._push(table, index)
+
+            counter[ITEMS] += 1
+
+    def statistics(self) -> dict[str, Any]:
+        with self.lock:
+            counter = self.counter.tolist()
+
+        hits, misses = counter[HITS], counter[MISSES]
+        used = counter[HIGH] - counter[FREE]
+
+        total = hits + misses
+
+        return {
+            'budget': self.budget,
+            'used': used * self.page * 4,
+            'items': counter[ITEMS],
+            'hits': hits,
+            'misses': misses,
+            'evictions': counter[EVICTIONS],
+            'ratio': hits / total if total else 0.0
+        }
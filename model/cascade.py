@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import numpy as np
+import pandas as pd
+import soundfile as sf
+
+from numpy.lib.stride_tricks import sliding_window_view
+from pathlib import Path
+from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from typing_extensions import Self
+
+
+def decay(
+    signal: npt.NDArray,
+    rate: int,
+    frame: float = 0.01,
+    span: float = 0.1
+) -> float:
+    if signal.ndim > 1:
+        signal = np.mean(signal, axis=0)
+
+    length = int(rate * frame)
+    count = len(signal) // length
+    size = int(round(span / frame))
+
+    if count < size:
+        return np.nan
+
+    energy = signal[:count * length].reshape(count, length)
+    energy = np.mean(energy ** 2, axis=1)
+
+    level = 10 * np.log10(energy + 1e-10)
+
+    # The slope of the level in dB per second over every span, as one
+    # least squares fit for all of them at once
+    window = sliding_window_view(level, size)
+
+    time = (np.arange(size) - (size - 1) / 2) * frame
+    slope = window @ time / np.sum(time ** 2)
+
+    # A room limits how fast sound can die away, so the steepest falls
+    # that start from a loud level track its decay
+    loud = window[:, 0] > np.max(level) - 30
+    falling = slope[loud & (slope < 0)]
+
+    if len(falling) == 0:
+        return np.nan
+
+    steepest = np.percentile(falling, 5)
+
+    # The time to fall by 60 dB at that slope
+    return -60 / steepest
+
+
+class Cascade():
+    def __init__(
+        self,
+        large: float = 1.0,
+        scale: float = 0.1,
+        small: float = 0.3,
+        threshold: float = 0.9
+    ):
+        self.mapping = {
+            'large': 0,
+            'medium': 1,
+            'small': 2
+        }
+
+        self.large = large
+        self.scale = scale
+        self.small = small
+        self.threshold = threshold
+
+    @classmethod
+    def from_json(cls: type[Self], path: Path) -> Self:
+        with open(path, 'r') as handle:
+            settings = json.load(handle)
+
+        return cls(**settings)
+
+    def save(self, path: Path) -> None:
+        settings = {
+            'large': self.large,
+            'scale': self.scale,
+            'small': self.small,
+            'threshold': self.threshold
+        }
+
+        with open(path, 'w') as handle:
+            json.dump(settings, handle, indent=4)
+
+    def calibrate(
+        self,
+        estimate: npt.NDArray,
+        label: npt.NDArray,
+        precision: float = 0.95
+    ) -> None:
+        valid = ~np.isnan(estimate)
+        estimate, label = estimate[valid], label[valid]
+
+        order = np.argsort(estimate)
+        estimate, label = estimate[order], label[order]
+
+        count = np.arange(1, len(label) + 1)
+
+        # The widest bound below which, or above which, the clips are
+        # of that room with the given precision
+        small = np.cumsum(label == self.mapping['small']) / count
+        small = np.flatnonzero(small >= precision)
+
+        if len(small) > 0:
+            self.small = float(estimate[small[-1]])
+
+        large = np.cumsum((label == self.mapping['large'])[::-1]) / count
+        large = np.flatnonzero(large >= precision)
+
+        if len(large) > 0:
+            self.large = float(estimate[::-1][large[-1]])
+
+    def confidence(self, estimate: float) -> tuple[int, float]:
+        if np.isnan(estimate):
+            return self.mapping['medium'], 0.0
+
+        logarithm = np.log(estimate)
+
+        small = 1 / (1 + np.exp((logarithm - np.log(self.small)) / self.scale))
+        large = 1 / (1 + np.exp((np.log(self.large) - logarithm) / self.scale))
+
+        if small >= large:
+            return self.mapping['small'], float(small)
+
+        return self.mapping['large'], float(large)
+
+    def __call__(self, signal: npt.NDArray, rate: int) -> int | None:
+        label, confidence = self.confidence(decay(signal, rate))
+
+        # An uncertain clip is left for the model
+        if confidence < self.threshold:
+            return None
+
+        return label
+
+
+def main() -> None:
+    current = Path.cwd().joinpath('../rirs')
+    annotation = pd.read_csv('annotation.csv')
+
+    cascade = Cascade()
+
+    label = annotation['label'].map(cascade.mapping).to_numpy()
+
+    estimate = []
+
+    for path in tqdm(annotation['path'], total=len(annotation)):
+        signal, rate = sf.read(current.joinpath(path), dtype='float32', always_2d=True)
+        estimate.append(decay(signal.T, rate))
+
+    estimate = np.array(estimate)
+
+    # Calibrate on one half of the annotation and measure on the other
+    generator = np.random.default_rng(0)
+    order = generator.permutation(len(estimate))
+
+    half = len(order) // 2
+    calibration, evaluation = order[:half], order[half:]
+
+    cascade.calibrate(estimate[calibration], label[calibration])
+    cascade.save(Path('state/cascade.json'))
+
+    decided = np.array([
+        cascade.confidence(estimate[i])
+        for i in evaluation
+    ])
+
+    handled = decided[:, 1] >= cascade.threshold
+    correct = decided[handled, 0] == label[evaluation][handled]
+
+    print(f"small: {cascade.small:.3f} s, large: {cascade.large:.3f} s")
+    print(f"cascade: {np.mean(handled):.4f} of clips")
+    print(f"model: {1 - np.mean(handled):.4f} of clips")
+
+    if np.any(handled):
+        print(f"cascade accuracy: {np.mean(correct):.4f}")
+
+
+if __name__ == '__main__':
+    main()
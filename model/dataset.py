@@ -1,46 +1,365 @@
+import math
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import torch
-import torchaudio
 
+from audio import info, load
+from cache import WaveformCache
 from collections.abc import Callable
+from pack import Pack
 from pathlib import Path
+from reader import Reader
+from store import FeatureStore
 from torch.utils.data import Dataset
-from typing_extensions import Any
+from typing_extensions import Any, Self
 
 
 class ReverberationDataset(Dataset):
     def __init__(
         self,
         annotation: pd.DataFrame | None = None,
+        augmentation: Callable | None = None,
+        cache: WaveformCache | None = None,
         current: Path | None = None,
         device: str | torch.device | None = None,
+        pack: Pack | None = None,
+        reader: Reader | None = None,
         settings: dict[str, Any] | None = None,
+        store: FeatureStore | None = None,
         transformation: Callable | None = None
     ):
-        self.annotation = annotation
-        self.current = current
-        self.device = device
         self.mapping = {
             'large': 0,
             'medium': 1,
             'small': 2
         }
+        self.annotation = annotation
+        self.augmentation = augmentation
+        self.cache = cache
+        self.current = current
+        self.device = device
+        self.pack = pack
+        self.reader = reader
         self.settings = settings
+        self.store = store
         self.transformation = transformation
 
+        self._decoded = None
+        self._window = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Workers only need the compiled arrays, not the DataFrame
+        state = self.__dict__.copy()
+        state['_annotation'] = None
+        state['_decoded'] = None
+
+        return state
+
+    def __copy__(self) -> Self:
+        # A copy within the process keeps the DataFrame, which only a
+        # pickle for the workers leaves behind
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        copied._decoded = None
+
+        return copied
+
     def __len__(self) -> int:
-        return len(self.annotation)
+        if self._window is not None:
+            return len(self._window)
 
-    def __getitem__(self, index: int) -> tuple[torch.Tensor, int]:
-        path = self.annotation.loc[index, 'path']
-        label = self.annotation.loc[index, 'label']
+        length = len(self._offset) - 1
+
+        if self.augmentation is None:
+            return length
+
+        # Every dry recording is rendered once per room
+        return length * len(self.mapping)
+
+    @property
+    def annotation(self) -> pd.DataFrame | None:
+        return self._annotation
+
+    @annotation.setter
+    def annotation(self, annotation: pd.DataFrame | None) -> None:
+        self._annotation = annotation
+
+        if annotation is None:
+            self._label = None
+            self._offset = None
+            self._path = None
+            return
+
+        # Compile the annotation into flat arrays, so an item is a pair
+        # of array lookups instead of two DataFrame lookups
+        path = [
+            str(path).encode('utf-8')
+            for path in annotation['path']
+        ]
+
+        self._offset = np.zeros(len(path) + 1, dtype=np.int64)
+        self._offset[1:] = np.cumsum([len(p) for p in path])
+
+        self._path = np.frombuffer(b''.join(path), dtype=np.uint8)
+
+        if 'label' in annotation:
+            label = annotation['label'].map(self.mapping).fillna(-1)
+        else:
+            label = np.full(len(path), -1)
+
+        self._label = np.asarray(label, dtype=np.int8)
+
+    @property
+    def windows(self) -> npt.NDArray | None:
+        # The file, position and first source frame of every window
+        return self._window
+
+    def duration(self) -> tuple[npt.NDArray, npt.NDArray]:
+        annotation = self.annotation
+
+        if 'frames' in annotation and 'rate' in annotation:
+            frames = annotation['frames'].to_numpy()
+            rate = annotation['rate'].to_numpy()
+        elif self.pack is not None:
+            frames = self.pack.length
+            rate = self.pack.rate
+        else:
+            header = [
+                info(self.current.joinpath(self._location(i)))
+                for i in range(len(self._offset) - 1)
+            ]
 
-        label = self.mapping.get(label)
+            frames, rate = np.array(header, dtype=np.int64).reshape(-1, 2).T
 
+        return frames.astype(np.int64), rate.astype(np.int64)
+
+    def window(
+        self,
+        item: list[int] | None = None,
+        duration: tuple[npt.NDArray, npt.NDArray] | None = None
+    ) -> None:
+        sample = self.settings.get('sample')
+        sample_rate = self.settings.get('sample_rate')
+
+        if duration is None:
+            duration = self.duration()
+
+        frames, rate = duration
+
+        # Every whole window of a file at the target rate, and at least
+        # one for a file shorter than a window
+        count = np.maximum(frames * sample_rate // rate // sample, 1)
+
+        start = np.repeat(np.cumsum(count) - count, count)
+
+        owner = np.repeat(np.arange(len(count)), count)
+        position = np.arange(np.sum(count)) - start
+
+        # The first source frame of each window, so a file can be read
+        # from the first window that is actually served
+        frame = position * sample * rate[owner] // sample_rate
+
+        window = np.stack([owner, position, frame], axis=1)
+
+        # A split keeps all windows of its own files and none of the rest
+        if item is not None:
+            window = window[np.isin(window[:, 0], item)]
+
+        self._window = window
+
+    def _location(self, index: int) -> str:
+        start, end = self._offset[index], self._offset[index + 1]
+        return self._path[start:end].tobytes().decode('utf-8')
+
+    def _augment(self, index: int) -> tuple[torch.Tensor, int]:
+        index, label = divmod(index, len(self.mapping))
+        room = {v: k for k, v in self.mapping.items()}[label]
+
+        path = self._location(index)
         location = self.current.joinpath(path)
 
-        signal, rate = torchaudio.load(location)
+        signal, rate, comment = load(location)
+
+        sample = self.settings.get('sample')
+        sample_rate = self.settings.get('sample_rate')
+
+        length = math.ceil(sample * rate / sample_rate)
+
+        signal = self.augmentation(signal, room, length)
+
+        if self.transformation is None:
+            return (signal, rate), label
+
         signal = signal.to(self.device)
-        signal = self.transformation(signal, rate)
+        signal = self.transformation(signal, rate, comment)
 
         return signal, label
+
+    def _read(
+        self,
+        index: int,
+        path: str,
+        start: int = 0
+    ) -> tuple[torch.Tensor, int, str | None]:
+        if self.pack is not None:
+            signal, rate = self.pack.read(index, start)
+            return signal, rate, None
+
+        location = self.current.joinpath(path)
+        return load(location, start)
+
+    def _cached(self, index: int, path: str) -> torch.Tensor:
+        signal = self.cache.get(index)
+
+        if signal is None:
+            signal, rate, comment = self._read(index, path)
+
+            signal = signal.to(self.device)
+            signal = self.transformation.waveform(signal, rate, comment)
+
+            self.cache.put(index, signal)
+
+        signal = signal.to(self.device)
+        return self.transformation.spectrogram(signal)
+
+    def _windowed(self, index: int) -> tuple[torch.Tensor, int]:
+        item, position, frame = self._window[index]
+
+        # The windows of a file arrive together and in order, so the
+        # file is decoded and resampled once, from its first requested
+        # window on, and kept until its last window is served
+        if (
+            self._decoded is None or
+            self._decoded[0] != item or
+            self._decoded[1] > position
+        ):
+            path = self._location(item)
+            signal, rate, comment = self._read(item, path, frame)
+
+            signal = signal.to(self.device)
+            signal = self.transformation.waveform(signal, rate, comment)
+
+            self._decoded = (item, position, signal)
+
+        _, first, signal = self._decoded
+
+        sample = self.settings.get('sample')
+        start = (position - first) * sample
+
+        signal = signal[:, start:start + sample]
+        signal = self.transformation.spectrogram(signal)
+
+        return signal, int(self._label[item])
+
+    def _transform(
+        self,
+        signal: torch.Tensor,
+        rate: int,
+        comment: str | None
+    ) -> torch.Tensor | tuple[torch.Tensor, int]:
+        # Without a transformation the clip is left for a batched
+        # transformation in the collate step
+        if self.transformation is None:
+            return signal, rate
+
+        signal = signal.to(self.device)
+        return self.transformation(signal, rate, comment)
+
+    def __getitem__(self, index: int) -> tuple[torch.Tensor, int]:
+        if self.store is not None:
+            return self.store.read(index)
+
+        if self._window is not None:
+            return self._windowed(index)
+
+        if self.augmentation is not None:
+            return self._augment(index)
+
+        path = self._location(index)
+        label = int(self._label[index])
+
+        if self.cache is not None:
+            return self._cached(index, path), label
+
+        signal, rate, comment = self._read(index, path)
+        return self._transform(signal, rate, comment), label
+
+    def __getitems__(self, indices: list[int]) -> list[tuple[torch.Tensor, int]]:
+        if (
+            self.reader is None or
+            self.store is not None or
+            self.augmentation is not None or
+            self.cache is not None or
+            self._window is not None
+        ):
+            return [self[index] for index in indices]
+
+        # The reads of a batch are issued ahead of the transformation,
+        # so several are in flight instead of one at a time, and those of
+        # the next batch of this worker when a LookaheadSampler names it
+        read = self.reader.map(
+            lambda index: self._read(index, self._location(index)),
+            indices,
+            getattr(indices, 'ahead', None)
+        )
+
+        return [
+            (self._transform(*item), int(self._label[index]))
+            for index, item in zip(indices, read)
+        ]
+
+
+class Collate():
+    def __init__(
+        self,
+        settings: dict[str, Any] | None = None,
+        transformation: Callable | None = None
+    ):
+        self.settings = settings
+        self.transformation = transformation
+
+    def __call__(
+        self,
+        batch: list[tuple[tuple[torch.Tensor, int], int]]
+    ) -> tuple[torch.Tensor, ...]:
+        sample = self.settings.get('sample')
+        sample_rate = self.settings.get('sample_rate')
+
+        signals = [signal for (signal, _), _ in batch]
+        rates = [rate for (_, rate), _ in batch]
+        labels = [label for _, label in batch]
+
+        # The statistics of each whole clip, as Transformation and the
+        # inference paths normalize over all of it, not over the cut
+        mean = torch.stack([signal.mean() for signal in signals])
+        deviation = torch.stack([signal.std() for signal in signals])
+
+        # Only the analysis window survives the transformation, so each
+        # clip is cut to the source samples that cover it
+        needed = [
+            math.ceil(sample * rate / sample_rate) + rate // 100
+            for rate in rates
+        ]
+
+        channels = max(signal.shape[0] for signal in signals)
+        length = max(needed)
+
+        x = torch.zeros(len(batch), channels, length)
+
+        lengths = []
+
+        for i, (signal, n) in enumerate(zip(signals, needed)):
+            signal = signal[:, :n]
+            x[i, :, :signal.shape[-1]] = signal
+
+            lengths.append(signal.shape[-1])
+
+        lengths = torch.tensor(lengths)
+        rates = torch.tensor(rates)
+        labels = torch.tensor(labels)
+
+        if self.transformation is None:
+            return x, lengths, rates, mean, deviation, labels
+
+        return self.transformation(x, lengths, rates, mean, deviation), labels
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import math
+import torch
+
+from model import Model
+from pathlib import Path
+from torch import nn
+from torch.nn.functional import conv1d, pad
+from transformation import Transformation
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Any
+
+
+class Frontend(nn.Module):
+    def __init__(self, transformation: Transformation):
+        super().__init__()
+
+        settings = transformation.settings
+        spectrogram = transformation.mel.spectrogram
+
+        self.n_fft = spectrogram.n_fft
+        self.hop_length = spectrogram.hop_length
+        self.sample_rate = settings.get('sample_rate')
+
+        # The short-time Fourier transform as a strided convolution with
+        # windowed cosine and sine kernels, which every runtime supports
+        frequency = torch.arange(self.n_fft // 2 + 1).unsqueeze(1)
+        time = torch.arange(self.n_fft).unsqueeze(0)
+
+        angle = 2 * math.pi * frequency * time / self.n_fft
+        window = spectrogram.window.cpu()
+
+        basis = torch.cat([torch.cos(angle), -torch.sin(angle)]) * window
+
+        self.register_buffer('basis', basis.unsqueeze(1).float())
+        self.register_buffer('filterbank', transformation.mel.mel_scale.fb.T.cpu())
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # The clip arrives normalized and resampled, in the order of
+        # Transformation.waveform, since resampling is not expressible
+        x = torch.mean(x, dim=0, keepdim=True)
+
+        # Cut and pad to one window without a length dependent branch
+        padding = torch.zeros(1, self.sample_rate, dtype=x.dtype)
+        x = torch.cat([x, padding], dim=1)[:, :self.sample_rate]
+
+        x = pad(x.unsqueeze(0), (self.n_fft // 2, self.n_fft // 2), mode='reflect')
+        x = conv1d(x, self.basis, stride=self.hop_length)
+
+        real, imaginary = torch.chunk(x, 2, dim=1)
+        x = real ** 2 + imaginary ** 2
+
+        x = torch.matmul(self.filterbank, x)
+
+        return x.unsqueeze(0)
+
+
+class Exported(nn.Module):
+    def __init__(self, model: Model, transformation: Transformation):
+        super().__init__()
+
+        self.frontend = Frontend(transformation)
+        self.model = model.fold()
+
+    def forward(self, x: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        feature = self.frontend(x)
+        probability = self.model(feature)
+
+        return probability, feature
+
+
+def export(
+    model: Model,
+    path: Path,
+    settings: dict[str, Any],
+    opset: int = 18
+) -> None:
+    transformation = Transformation(
+        device='cpu',
+        settings=settings
+    )
+
+    exported = Exported(model, transformation).eval()
+
+    # A normalized, resampled and possibly multichannel clip of any
+    # length
+    example = torch.randn(2, settings.get('sample_rate') * 2)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            exported,
+            (example,),
+            path,
+            dynamic_axes={'signal': {0: 'channel', 1: 'time'}},
+            external_data=False,
+            input_names=['signal'],
+            opset_version=opset,
+            output_names=['probability', 'feature']
+        )
+
+
+def main() -> None:
+    settings = {
+        'hop_length': 512,
+        'n_fft': 1024,
+        'n_mels': 128,
+        'sample_rate': 16000
+    }
+
+    model = Model()
+    model.load_state_dict(torch.load('state/model.pth', map_location='cpu'))
+    model.eval()
+
+    export(model, Path('state/model.onnx'), settings)
+
+
+if __name__ == '__main__':
+    main()
@@ -32,7 +32,7 @@ def main() -> None:
     predictor = Predictor()
     predictor.annotation = annotation
     predictor.mapping = mapping
-    predictor.model = model
+    predictor.model = model.optimize_for_inference()
 
     sound = current.joinpath('sound')
     file = sound.joinpath('p232_085.wav')
@@ -1,13 +1,27 @@
+import copy
+import os
 import pandas as pd
 import pickle
 import torch
 
-from dataset import ReverberationDataset
-from model import Model
+from archive import ArchiveDataset
+from augmentation import Reverberation
+from cache import WaveformCache
+from dataset import Collate, ReverberationDataset
+from model import Model, Student
+from pack import Pack
 from pathlib import Path
-from torch.utils.data import DataLoader
+from reader import Reader
+from sampler import BucketSampler, LookaheadSampler, WindowSampler
+from store import FeatureStore
+from torch.utils.data import (
+    BatchSampler,
+    DataLoader,
+    RandomSampler,
+    SequentialSampler
+)
 from trainer import Trainer
-from transformation import Transformation
+from transformation import BatchTransformation, Transformation, warm
 
 
 def main() -> None:
@@ -25,8 +39,43 @@ def main() -> None:
 
     path = root.joinpath('annotation.csv')
 
-    if path.exists():
+    # Written by dataset/index.py from the file headers alone
+    index = current.joinpath('index.csv')
+
+    # Convolve dry speech with the impulse response bank while loading,
+    # instead of reading the corpus rendered by dataset/render.py. The
+    # bank is built on its own by dataset/bank.py
+    online = False
+    augmentation = None
+
+    # Read the rendered corpus from the packed shards instead of one
+    # file per recording
+    packed = False
+    pack = None
+
+    if online:
+        current = root.joinpath('dataset/converted/train-clean-100')
+
+        bank = root.joinpath('dataset/bank')
+        augmentation = Reverberation.from_bank(bank)
+
+        speech = [
+            {'path': file.relative_to(current)}
+            for file in current.glob('*/*/*.wav')
+            if file.is_file()
+        ]
+
+        annotation = pd.DataFrame.from_dict(speech)
+    elif packed:
+        pack = Pack(
+            root.joinpath('dataset/render/pack')
+        )
+
+        annotation = pack.index[['path', 'label']]
+    elif path.exists():
         annotation = pd.read_csv(path)
+    elif index.exists():
+        annotation = pd.read_csv(index)
     else:
         room = [
             {
@@ -52,11 +101,19 @@ def main() -> None:
         'sample_rate': sample_rate
     }
 
+    # Run decoding and the transformation on the CPU in loader worker
+    # processes, and copy only finished batches to the device
+    parallel = False
+    host = 'cpu' if parallel else device
+
     transformation = Transformation(
-        device=device,
+        device=host,
         settings=settings
     )
 
+    if 'rate' in annotation:
+        warm(annotation['rate'].tolist(), sample_rate, host)
+
     settings = {
         'sample': sample,
         'sample_rate': sample_rate
@@ -64,43 +121,274 @@ def main() -> None:
 
     dataset = ReverberationDataset()
     dataset.annotation = annotation
+    dataset.augmentation = augmentation
     dataset.current = current
-    dataset.device = device
+    dataset.device = host
+    dataset.pack = pack
     dataset.settings = settings
     dataset.transformation = transformation
 
-    length = len(dataset)
+    # Run the transformation once over the annotation and serve the mel
+    # spectrograms from a memory-mapped store in every epoch
+    stored = False
 
-    trl = int(length * 0.70)
-    val = int(length * 0.15)
-    tel = length - (trl + val)
+    if stored and augmentation is None:
+        store = FeatureStore(
+            Path.cwd().joinpath('store'),
+            {**transformation.settings, **settings}
+        )
 
-    train, validation, test = torch.utils.data.random_split(
-        dataset,
-        [trl, val, tel]
-    )
+        if not store.valid(dataset):
+            store.build(dataset)
+
+        dataset.store = store
+
+    # Keep decoded, resampled waveforms in a shared, byte-budgeted cache
+    # when the feature store cannot be used
+    cached = False
+    cache = None
+
+    if cached and dataset.store is None and augmentation is None:
+        cache = WaveformCache(
+            budget=4 * 2 ** 30,
+            length=len(dataset)
+        )
+
+        dataset.cache = cache
+
+    # Keep several reads in flight in every loader worker, across batch
+    # boundaries, for storage where the latency of a read matters more
+    # than its size
+    prefetched = False
+    reader = None
+
+    if prefetched:
+        reader = Reader(depth=32, workers=8)
+        dataset.reader = reader
+
+    # Serve every one second window of a file as its own example, and
+    # decode the file once for all of its windows
+    windowed = False
+
+    if (
+        windowed and
+        augmentation is None and
+        dataset.store is None and
+        dataset.cache is None
+    ):
+        length = len(dataset)
+
+        trl = int(length * 0.70)
+        val = int(length * 0.15)
+
+        # Split by file, so no recording has windows in two splits
+        permutation = torch.randperm(length).tolist()
+
+        split = [
+            permutation[:trl],
+            permutation[trl:trl + val],
+            permutation[trl + val:]
+        ]
+
+        # The headers are read once for all three splits
+        duration = dataset.duration()
+
+        train, validation, test = [copy.copy(dataset) for _ in split]
+
+        for subset, item in zip([train, validation, test], split):
+            subset.window(item, duration)
+
+        owner = [
+            set(subset.windows[:, 0].tolist())
+            for subset in [train, validation, test]
+        ]
+
+        if owner[0] & owner[1] or owner[0] & owner[2] or owner[1] & owner[2]:
+            message = 'A recording has windows in more than one split'
+            raise ValueError(message)
+
+        order = {
+            'train': {'sampler': WindowSampler(train.windows)},
+            'validation': {
+                'sampler': WindowSampler(validation.windows, shuffle=False)
+            },
+            'test': {'sampler': WindowSampler(test.windows, shuffle=False)}
+        }
+    else:
+        windowed = False
+
+        length = len(dataset)
+
+        trl = int(length * 0.70)
+        val = int(length * 0.15)
+        tel = length - (trl + val)
+
+        train, validation, test = torch.utils.data.random_split(
+            dataset,
+            [trl, val, tel]
+        )
+
+        order = {
+            'train': {'shuffle': True},
+            'validation': {'shuffle': False},
+            'test': {'shuffle': False}
+        }
+
+    # Stream the rendered corpus from the tar shards written by
+    # dataset/archive.py, either from a directory or an HTTP mirror
+    archived = False
+
+    if archived:
+        location = root.joinpath('dataset/render/archive').as_posix()
+
+        train, validation, test = [
+            ArchiveDataset(
+                f"{location}/{name}",
+                device=host,
+                shuffle=name == 'train',
+                transformation=transformation
+            )
+            for name in order
+        ]
+
+        order = {name: {} for name in order}
 
     batch_size = 128
+    workers = min(8, os.cpu_count()) if parallel else 0
+
+    loader = {
+        'batch_size': batch_size,
+        'num_workers': workers,
+        'persistent_workers': workers > 0,
+        # Only the CPU tensors of the loader workers can be pinned
+        'pin_memory': parallel and device.type == 'cuda',
+        'prefetch_factor': 4 if workers > 0 else None
+    }
+
+    # Transform whole batches in the collate step instead of one clip
+    # at a time in the dataset
+    batched = False
+
+    if (
+        batched and
+        not archived and
+        not windowed and
+        dataset.store is None and
+        dataset.cache is None
+    ):
+        dataset.transformation = None
+
+        loader['collate_fn'] = Collate(
+            settings=settings,
+            transformation=BatchTransformation(
+                device='cpu',
+                settings=transformation.settings
+            )
+        )
+
+    # Batch files of a similar duration together, from the durations in
+    # the corpus index, so no batch waits on a few long decodes
+    bucketed = False
+
+    if (
+        bucketed and
+        not archived and
+        augmentation is None and
+        dataset.store is None
+    ):
+        frames, rate = dataset.duration()
+        seconds = frames / rate
+
+        batch_size = loader.pop('batch_size')
+
+        shuffle = {
+            'train': True,
+            'validation': False,
+            'test': False
+        }
+
+        for name, subset in zip(shuffle, [train, validation, test]):
+            if windowed:
+                item = subset.windows[:, 0]
+
+                sampler = BucketSampler(
+                    seconds[item],
+                    batch_size,
+                    group=item,
+                    shuffle=shuffle[name]
+                )
+            else:
+                sampler = BucketSampler(
+                    seconds[subset.indices],
+                    batch_size,
+                    shuffle=shuffle[name]
+                )
+
+            order[name] = {'batch_sampler': sampler}
+
+    # Name the next batch of each loader worker in the batch it gets now,
+    # so its reads start before the batch boundary
+    if reader is not None and not archived and not windowed:
+        loader.pop('batch_size', None)
+
+        stride = max(workers, 1)
+
+        for name, subset in zip(order, [train, validation, test]):
+            sampler = order[name].get('batch_sampler')
+
+            if sampler is None:
+                sampler = BatchSampler(
+                    RandomSampler(subset)
+                    if order[name].get('shuffle')
+                    else SequentialSampler(subset),
+                    batch_size,
+                    drop_last=False
+                )
+
+            order[name] = {
+                'batch_sampler': LookaheadSampler(
+                    sampler,
+                    subset.indices,
+                    stride
+                )
+            }
+
+        # The sampler maps the positions of each split to the dataset
+        train, validation, test = dataset, dataset, dataset
 
     training = DataLoader(
         dataset=train,
-        batch_size=batch_size,
-        shuffle=True
+        **order['train'],
+        **loader
     )
 
     testing = DataLoader(
         dataset=test,
-        batch_size=batch_size,
-        shuffle=False
+        **order['test'],
+        **loader
     )
 
     validating = DataLoader(
         dataset=validation,
-        batch_size=batch_size,
-        shuffle=False
+        **order['validation'],
+        **loader
     )
 
     model = Model()
+
+    # Train a small student to follow the trained model instead of
+    # training the model itself
+    distilled = False
+    teacher = None
+
+    if distilled:
+        teacher = Model()
+        teacher.load_state_dict(
+            torch.load('state/model.pth', map_location=device)
+        )
+
+        model = Student()
+
     model.device = device
 
     loss = torch.nn.CrossEntropyLoss()
@@ -124,14 +412,30 @@ def main() -> None:
     trainer.model = model
     trainer.optimizer = optimizer
     trainer.scheduler = scheduler
+    trainer.teacher = teacher
     trainer.testing = testing
     trainer.training = training
     trainer.validating = validating
     history = trainer.start()
 
+    if cache is not None:
+        print(cache.statistics())
+
+    if reader is not None:
+        print(reader.statistics())
+
+    if teacher is not None:
+        for name, result in trainer.report().items():
+            print(
+                f"{name}: "
+                f"accuracy {result['accuracy']:.4f}, "
+                f"parameters {result['parameters']}, "
+                f"latency {result['latency'] * 1000:.2f} ms"
+            )
+
     torch.save(
         model.state_dict(),
-        'state/model.pth'
+        'state/student.pth' if distilled else 'state/model.pth'
     )
 
     with open('state/trainer.pkl', 'wb') as handle:
@@ -1,10 +1,57 @@
 from __future__ import annotations
 
+import copy
 import torch
 
 from torch import nn
 
 
+def _affine(norm: nn.BatchNorm1d | nn.BatchNorm2d) -> tuple[torch.Tensor, ...]:
+    # In eval mode a batch norm is the affine map x * scale + shift
+    scale = norm.weight / torch.sqrt(norm.running_var + norm.eps)
+    shift = norm.bias - norm.running_mean * scale
+
+    return scale, shift
+
+
+def _before(linear: nn.Linear, norm: nn.BatchNorm1d) -> nn.Linear:
+    # A batch norm after a linear layer scales its rows
+    scale, shift = _affine(norm)
+
+    linear.weight.copy_(linear.weight * scale.unsqueeze(1))
+    linear.bias.copy_(linear.bias * scale + shift)
+
+    return linear
+
+
+def _after(
+    norm: nn.BatchNorm1d,
+    linear: nn.Linear,
+    repeat: int = 1
+) -> nn.Linear:
+    # A batch norm before a linear layer scales its columns, with one
+    # channel spread over repeat features when it is flattened
+    scale, shift = _affine(norm)
+
+    scale = torch.repeat_interleave(scale, repeat)
+    shift = torch.repeat_interleave(shift, repeat)
+
+    linear.bias.copy_(linear.bias + linear.weight @ shift)
+    linear.weight.copy_(linear.weight * scale.unsqueeze(0))
+
+    return linear
+
+
+def _merge(first: nn.Linear, second: nn.Linear) -> nn.Linear:
+    # Two linear layers with nothing between them are one linear layer
+    linear = nn.Linear(first.in_features, second.out_features)
+
+    linear.weight.copy_(second.weight @ first.weight)
+    linear.bias.copy_(second.weight @ first.bias + second.bias)
+
+    return linear
+
+
 class Model(nn.Module):
     def __init__(self, device: str | torch.device = 'cpu'):
         super().__init__()
@@ -60,6 +107,114 @@ class Model(nn.Module):
             nn.Softmax(dim=1)
         )
 
+    def fold(self) -> Model:
+        model = copy.deepcopy(self).cpu().eval()
+
+        convolutional = list(model.convolutional)
+        first, norm, second, relu, middle, third, last, softmax = model.output
+
+        with torch.no_grad():
+            # The last batch norm reaches the head through a max and an
+            # average pool, which only commute with a positive scale
+            scale, _ = _affine(convolutional[-2])
+            height, width = model.pool.output_size
+
+            if torch.all(scale > 0):
+                first = _after(convolutional[-2], first, height * width)
+                convolutional[-2] = nn.Identity()
+
+            first = _before(first, norm)
+            first = _merge(first, second)
+
+            third = _after(middle, third)
+            third = _before(third, last)
+
+        # The other batch norms feed a zero padded convolution, where a
+        # fold would change the padded border, so they are kept
+        model.convolutional = nn.Sequential(*convolutional)
+        model.output = nn.Sequential(first, relu, third, softmax)
+
+        return model
+
+    def optimize_for_inference(
+        self,
+        example: torch.Tensor | None = None
+    ) -> torch.jit.ScriptModule:
+        if example is None:
+            example = torch.zeros(1, 1, 128, 32)
+
+        model = self.fold()
+        model = model.to(memory_format=torch.channels_last)
+
+        example = example.cpu().contiguous(memory_format=torch.channels_last)
+
+        with torch.no_grad():
+            traced = torch.jit.trace(model, example)
+
+        return torch.jit.freeze(traced)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.convolutional(x)
+        x = self.pool(x)
+        x = torch.flatten(x, 1)
+        x = self.output(x)
+
+        return x
+
+
+class Student(nn.Module):
+    def __init__(self, device: str | torch.device = 'cpu'):
+        super().__init__()
+        self.device = device
+
+        # The first convolution is strided, so the rest of the network
+        # runs on a quarter of the spectrogram
+
+        self.convolutional = nn.Sequential(
+            nn.Conv2d(
+                in_channels=1,
+                out_channels=8,
+                kernel_size=3,
+                stride=2,
+                padding=1
+            ),
+            nn.ReLU(),
+            nn.BatchNorm2d(8),
+            nn.MaxPool2d(kernel_size=2),
+
+            nn.Conv2d(
+                in_channels=8,
+                out_channels=16,
+                kernel_size=3,
+                stride=1,
+                padding=1
+            ),
+            nn.ReLU(),
+            nn.BatchNorm2d(16),
+            nn.MaxPool2d(kernel_size=2),
+
+            nn.Conv2d(
+                in_channels=16,
+                out_channels=32,
+                kernel_size=3,
+                stride=1,
+                padding=1
+            ),
+            nn.ReLU(),
+            nn.BatchNorm2d(32),
+            nn.MaxPool2d(kernel_size=2),
+        )
+
+        self.pool = nn.AdaptiveAvgPool2d((4, 1))
+
+        self.output = nn.Sequential(
+            nn.Linear(32 * 4 * 1, 32),
+            nn.ReLU(),
+
+            nn.Linear(32, 3),
+            nn.Softmax(dim=1)
+        )
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         x = self.convolutional(x)
         x = self.pool(x)
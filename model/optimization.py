@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import statistics
+import time
+import torch
+
+from audio import load
+from model import Model
+from pathlib import Path
+from transformation import Transformation
+
+
+def latency(model: torch.nn.Module, x: list[torch.Tensor]) -> float:
+    elapsed = []
+
+    with torch.no_grad():
+        for signal in x:
+            model(signal)
+
+        for signal in x:
+            start = time.perf_counter()
+            model(signal)
+            elapsed.append(time.perf_counter() - start)
+
+    return statistics.median(elapsed)
+
+
+def main() -> None:
+    torch.set_num_threads(1)
+
+    root = Path.cwd().parent
+
+    settings = {
+        'hop_length': 512,
+        'n_fft': 1024,
+        'n_mels': 128,
+        'sample_rate': 16000
+    }
+
+    transformation = Transformation(
+        device='cpu',
+        settings=settings
+    )
+
+    # The parity check holds for any weights, so it runs on a seeded,
+    # untrained model when there is no trained one
+    torch.manual_seed(0)
+
+    model = Model()
+    state = Path('state/model.pth')
+
+    if state.exists():
+        model.load_state_dict(torch.load(state, map_location='cpu'))
+
+    model.eval()
+
+    optimized = model.optimize_for_inference()
+
+    x = []
+
+    for path in sorted(root.joinpath('samples').glob('*/*.wav')):
+        signal, rate, comment = load(path)
+        signal = transformation(signal, rate, comment)
+
+        x.append(signal.unsqueeze(0))
+
+    # The folded graph has to agree with the model it was built from
+    # on every clip, and pick the same room
+    with torch.no_grad():
+        for signal in x:
+            expected = model(signal)
+            actual = optimized(signal)
+
+            torch.testing.assert_close(actual, expected, atol=1e-5, rtol=1e-5)
+            torch.testing.assert_close(actual.argmax(1), expected.argmax(1))
+
+    baseline = latency(model, x)
+    fast = latency(optimized, x)
+
+    print(f"parity: {len(x)} clips")
+    print(f"model: {baseline * 1000:.2f} ms")
+    print(f"optimized: {fast * 1000:.2f} ms ({baseline / fast:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
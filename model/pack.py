@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import torch
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from pathlib import Path
+    from typing_extensions import Any
+
+
+class Pack():
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.index = None
+        self._map = {}
+
+        if path is not None:
+            self.index = pd.read_csv(
+                path.joinpath('index.csv')
+            )
+
+            self._length = self.index['length'].to_numpy()
+            self._offset = self.index['offset'].to_numpy()
+            self._rate = self.index['rate'].to_numpy()
+            self._shard = self.index['shard'].to_numpy()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Each worker maps the shards itself rather than receiving a copy
+        state = self.__dict__.copy()
+        state['_map'] = {}
+
+        return state
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def length(self) -> npt.NDArray:
+        return self._length
+
+    @property
+    def rate(self) -> npt.NDArray:
+        return self._rate
+
+    def _open(self, shard: str) -> np.memmap:
+        if shard not in self._map:
+            self._map[shard] = np.memmap(
+                self.path.joinpath(shard),
+                dtype='<i2',
+                mode='r'
+            )
+
+        return self._map[shard]
+
+    def read(
+        self,
+        index: int,
+        start: int = 0,
+        frames: int = -1
+    ) -> tuple[torch.Tensor, int]:
+        offset = self._offset[index]
+        length = self._length[index]
+
+        end = length if frames < 0 else min(length, start + frames)
+
+        shard = self._open(self._shard[index])
+        signal = shard[offset + start:offset + end]
+
+        # Match the scaling of torchaudio.load for 16-bit PCM
+        signal = torch.from_numpy(
+            signal.astype(np.float32) / 32768
+        )
+
+        return signal.unsqueeze(0), int(self._rate[index])
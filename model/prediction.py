@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-import torch
-import torchaudio
+import numpy as np
+import soundfile as sf
 
-from model.transformation import Transformation
+from model.backend import TorchBackend
 from typing import TYPE_CHECKING
 from model.visualize import Envelope, Spectrogram, Waveform
 
 if TYPE_CHECKING:
+    import torch
+
+    from collections.abc import Callable
     from model import Model
+    from model.cascade import Cascade
     from pathlib import Path
     from torch.utils.data import DataLoader
     from typing_extensions import Any
@@ -17,41 +21,73 @@ if TYPE_CHECKING:
 class Predictor():
     def __init__(
         self,
+        backend: Callable | None = None,
+        cascade: Cascade | None = None,
         device: str | torch.device = 'cpu',
         loader: DataLoader | None = None,
         mapping: dict[Any, Any] = None,
         model: Model = None,
         sample: None = None
     ):
+        self.backend = backend
+        self.cascade = cascade
         self.device = device
         self.loader = loader
         self.mapping = mapping
         self.model = model
         self.sample = sample
-
-    def from_path(self, path: Path) -> list[dict[Any, Any]]:
-        settings = {
+        self.settings = {
             'hop_length': 512,
             'n_fft': 1024,
             'n_mels': 128,
             'sample_rate': 16000
         }
 
-        transformation = Transformation(
-            device=self.device,
-            settings=settings
-        )
+        # The clips decided by the cascade and by the model
+        self.count = {
+            'cascade': 0,
+            'model': 0
+        }
+
+    def statistics(self) -> dict[str, Any]:
+        total = sum(self.count.values())
+
+        return {
+            stage: count / total if total else 0.0
+            for stage, count in self.count.items()
+        }
+
+    def from_path(self, path: Path) -> list[dict[Any, Any]]:
+        settings = self.settings
+
+        # Without a backend chosen at construction, the model runs in
+        # PyTorch, built once so its transformation is reused
+        if self.backend is None:
+            self.backend = TorchBackend(
+                device=self.device,
+                model=self.model,
+                settings=settings
+            )
+
+        signal, rate = sf.read(path, dtype='float32', always_2d=True)
+
+        label = None
 
-        signal, rate = torchaudio.load(path)
-        signal = signal.to(self.device)
-        signal = transformation(signal, rate)
+        # A clip with a clear decay is decided without the transformation
+        # and the model
+        if self.cascade is not None:
+            label = self.cascade(signal.T, rate)
 
-        signal = signal.unsqueeze(0)
+        if label is None:
+            stage = 'model'
 
-        label = self.model(signal)
+            probability, signal = self.backend(signal.T, rate)
+            label = np.argmax(probability.flatten()).item()
+        else:
+            stage = 'cascade'
+            signal = None
 
-        label = label.detach().flatten()
-        label = torch.argmax(label, dim=0).item()
+        self.count[stage] = self.count[stage] + 1
 
         label = self.mapping[label]
 
@@ -64,12 +100,21 @@ class Predictor():
                 'waveform': Waveform.from_signal(path),
             },
             "transform": {
-                'envelope': Envelope.from_tensor(signal),
-                'spectrogram': Spectrogram.from_tensor(signal, settings),
+                'envelope': (
+                    None
+                    if signal is None
+                    else Envelope.from_tensor(signal)
+                ),
+                'spectrogram': (
+                    None
+                    if signal is None
+                    else Spectrogram.from_tensor(signal, settings)
+                ),
                 'waveform': None,
             },
             'prediction': {
                 'label': label,
+                'stage': stage,
             },
             'path': path
         }
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import copy
+import io
+import pandas as pd
+import statistics
+import time
+import torch
+
+from dataset import ReverberationDataset
+from model import Model
+from pathlib import Path
+from torch import nn
+from torch.ao.quantization import (
+    DeQuantStub,
+    QuantStub,
+    convert,
+    fuse_modules,
+    get_default_qconfig,
+    prepare,
+    quantize_dynamic
+)
+from transformation import Transformation
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class QuantizedModel(nn.Module):
+    def __init__(self, model: Model):
+        super().__init__()
+
+        self.device = 'cpu'
+
+        self.quantize = QuantStub()
+        self.convolutional = copy.deepcopy(model.convolutional)
+        self.pool = copy.deepcopy(model.pool)
+        self.dequantize = DeQuantStub()
+        self.output = copy.deepcopy(model.output)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.quantize(x)
+        x = self.convolutional(x)
+        x = self.pool(x)
+        x = self.dequantize(x)
+        x = torch.flatten(x, 1)
+        x = self.output(x)
+
+        return x
+
+
+def _structure(model: Model, backend: str) -> QuantizedModel:
+    torch.backends.quantized.engine = backend
+
+    quantized = QuantizedModel(model).eval()
+
+    # Each ReLU follows its convolution, so the pair runs as one int8
+    # kernel, and the first linear layer absorbs its batch norm
+    fuse_modules(
+        quantized.convolutional,
+        [['0', '1'], ['4', '5'], ['8', '9']],
+        inplace=True
+    )
+
+    fuse_modules(quantized.output, [['0', '1']], inplace=True)
+
+    # The head is quantized dynamically, so it is kept out of the
+    # static calibration
+    quantized.qconfig = get_default_qconfig(backend)
+    quantized.output.qconfig = None
+
+    prepare(quantized, inplace=True)
+
+    return quantized
+
+
+def _finish(quantized: QuantizedModel) -> QuantizedModel:
+    convert(quantized, inplace=True)
+
+    quantized.output = quantize_dynamic(
+        quantized.output,
+        {nn.Linear},
+        dtype=torch.qint8
+    )
+
+    return quantized
+
+
+def quantize(
+    model: Model,
+    calibration: Iterable[torch.Tensor],
+    backend: str = 'x86'
+) -> QuantizedModel:
+    model = copy.deepcopy(model).cpu().eval()
+
+    quantized = _structure(model, backend)
+
+    # The observers record the range of every activation over the
+    # calibration batches
+    with torch.no_grad():
+        for x in calibration:
+            quantized(x.cpu())
+
+    return _finish(quantized)
+
+
+def save(quantized: QuantizedModel, path: Path, backend: str = 'x86') -> None:
+    state = {
+        'backend': backend,
+        'state': quantized.state_dict()
+    }
+
+    torch.save(state, path)
+
+
+def load(path: Path) -> QuantizedModel:
+    state = torch.load(path, weights_only=False)
+    backend = state['backend']
+
+    # The int8 layers are rebuilt from a float model of the same shape,
+    # then take the saved weights, scales and zero points
+    quantized = _finish(_structure(Model(), backend))
+    quantized.load_state_dict(state['state'])
+
+    return quantized.eval()
+
+
+def size(model: nn.Module) -> int:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+
+    return buffer.tell()
+
+
+def latency(model: nn.Module, x: torch.Tensor, repeat: int = 100) -> float:
+    elapsed = []
+
+    with torch.no_grad():
+        for _ in range(10):
+            model(x)
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model(x)
+            elapsed.append(time.perf_counter() - start)
+
+    return statistics.median(elapsed)
+
+
+def accuracy(
+    model: nn.Module,
+    batches: list[tuple[torch.Tensor, torch.Tensor]]
+) -> float:
+    correct = 0
+    total = 0
+
+    with torch.no_grad():
+        for x, y in batches:
+            prediction = torch.argmax(model(x), dim=1)
+
+            correct = correct + torch.sum(prediction == y).item()
+            total = total + len(y)
+
+    return correct / total
+
+
+def main() -> None:
+    torch.set_num_threads(1)
+
+    current = Path.cwd().joinpath('../rirs')
+    annotation = pd.read_csv('annotation.csv')
+
+    settings = {
+        'hop_length': 512,
+        'n_fft': 1024,
+        'n_mels': 128,
+        'sample_rate': 16000
+    }
+
+    transformation = Transformation(
+        device='cpu',
+        settings=settings
+    )
+
+    dataset = ReverberationDataset()
+    dataset.annotation = annotation
+    dataset.current = current
+    dataset.device = 'cpu'
+    dataset.settings = {'sample': 16000, 'sample_rate': 16000}
+    dataset.transformation = transformation
+
+    model = Model()
+    model.load_state_dict(torch.load('state/model.pth'))
+    model.eval()
+
+    # Calibrate on one random sample of the annotation and evaluate
+    # on another
+    generator = torch.Generator().manual_seed(0)
+    order = torch.randperm(len(dataset), generator=generator).tolist()
+
+    calibration, evaluation = order[:512], order[512:2560]
+
+    def batches(indices: list[int]) -> list[tuple[torch.Tensor, torch.Tensor]]:
+        items = [dataset[index] for index in indices]
+
+        return [
+            (
+                torch.stack([x for x, _ in items[i:i + 64]]),
+                torch.tensor([y for _, y in items[i:i + 64]])
+            )
+            for i in range(0, len(items), 64)
+        ]
+
+    calibration = batches(calibration)
+    evaluation = batches(evaluation)
+
+    quantized = quantize(model, [x for x, _ in calibration])
+
+    save(quantized, Path('state/quantized.pth'))
+    quantized = load(Path('state/quantized.pth'))
+
+    x, _ = evaluation[0]
+    x = x[:1]
+
+    report = {}
+
+    for name, candidate in [('float', model), ('int8', quantized)]:
+        report[name] = {
+            'accuracy': accuracy(candidate, evaluation),
+            'latency': latency(candidate, x),
+            'size': size(candidate)
+        }
+
+    for name, result in report.items():
+        print(
+            f"{name}: "
+            f"accuracy {result['accuracy']:.4f}, "
+            f"latency {result['latency'] * 1000:.2f} ms, "
+            f"size {result['size'] / 2 ** 20:.2f} MiB"
+        )
+
+
+if __name__ == '__main__':
+    main()
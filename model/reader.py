@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import time
+import torch
+
+from concurrent.futures import ThreadPoolExecutor
+from torch.utils.data import get_worker_info
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from typing_extensions import Any
+
+
+class Reader():
+    def __init__(self, depth: int = 32, slots: int = 64, workers: int = 8):
+        self.depth = depth
+        self.slots = slots
+        self.workers = workers
+
+        self._executor = None
+        self._pending = {}
+
+        # The reads, the seconds spent reading and the seconds spent
+        # waiting on a read, with one row for each loader worker so no
+        # lock is needed
+        self.counter = torch.zeros(slots, 3, dtype=torch.float64).share_memory_()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Each worker starts its own threads rather than receiving them
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_pending'] = {}
+
+        return state
+
+    def _slot(self) -> int:
+        information = get_worker_info()
+
+        if information is None:
+            return 0
+
+        return (information.id + 1) % self.slots
+
+    def _timed(self, read: Callable, index: int) -> tuple[Any, float]:
+        start = time.perf_counter()
+        result = read(index)
+
+        return result, time.perf_counter() - start
+
+    def map(
+        self,
+        read: Callable,
+        indices: list[int],
+        ahead: list[int] | None = None
+    ) -> Iterator[Any]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+
+        counter = self.counter[self._slot()]
+
+        indices = list(indices)
+        wanted = indices + [index for index in ahead or [] if index not in indices]
+
+        # A read issued ahead for a batch that went elsewhere is dropped
+        for index in set(self._pending) - set(wanted):
+            self._pending.pop(index).cancel()
+
+        order = iter(wanted)
+
+        def issue() -> None:
+            # Keep up to depth reads in flight, past the end of this batch
+            # and into the next one, which is left running on return
+            for index in order:
+                if index not in self._pending:
+                    self._pending[index] = self._executor.submit(
+                        self._timed,
+                        read,
+                        index
+                    )
+
+                if len(self._pending) >= self.depth:
+                    break
+
+        issue()
+
+        for index in indices:
+            future = self._pending.pop(index, None)
+
+            if future is None:
+                future = self._executor.submit(self._timed, read, index)
+
+            start = time.perf_counter()
+            result, elapsed = future.result()
+            wait = time.perf_counter() - start
+
+            counter += torch.tensor([1.0, elapsed, wait], dtype=torch.float64)
+
+            issue()
+
+            yield result
+
+    def statistics(self) -> dict[str, Any]:
+        reads, read, wait = self.counter.sum(dim=0).tolist()
+
+        return {
+            'depth': self.depth,
+            'workers': self.workers,
+            'reads': int(reads),
+            'read': read,
+            'wait': wait,
+            'ratio': wait / read if read else 0.0
+        }
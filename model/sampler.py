@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import math
+import numpy as np
+
+from collections import deque
+from torch.utils.data import Sampler
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from collections.abc import Iterable, Iterator
+
+
+class WindowSampler(Sampler[int]):
+    def __init__(
+        self,
+        window: npt.NDArray,
+        limit: int | None = None,
+        seed: int = 0,
+        shuffle: bool = True
+    ):
+        self.limit = limit
+        self.seed = seed
+        self.shuffle = shuffle
+        self.epoch = 0
+
+        # The windows of each file, which the dataset lists together
+        item = window[:, 0]
+        boundary = np.flatnonzero(np.diff(item)) + 1
+
+        self.group = np.split(np.arange(len(item)), boundary)
+
+    def __len__(self) -> int:
+        if self.limit is None:
+            return sum(len(group) for group in self.group)
+
+        return sum(min(len(group), self.limit) for group in self.group)
+
+    def __iter__(self) -> Iterator[int]:
+        generator = np.random.default_rng([self.seed, self.epoch])
+        self.epoch = self.epoch + 1
+
+        order = np.arange(len(self.group))
+
+        if self.shuffle:
+            generator.shuffle(order)
+
+        # Files are visited in a random order, but the windows of one
+        # file are yielded back to back and in order, so it is decoded
+        # only once and only from its first chosen window on
+        for i in order:
+            group = self.group[i]
+
+            if self.limit is not None and len(group) > self.limit:
+                group = np.sort(
+                    generator.choice(group, self.limit, replace=False)
+                )
+
+            yield from group.tolist()
+
+
+class BucketSampler(Sampler[list[int]]):
+    def __init__(
+        self,
+        duration: npt.NDArray,
+        batch_size: int = 128,
+        bucket: int = 8,
+        group: npt.NDArray | None = None,
+        seed: int = 0,
+        shuffle: bool = True
+    ):
+        self.batch_size = batch_size
+        self.bucket = bucket
+        self.seed = seed
+        self.shuffle = shuffle
+        self.epoch = 0
+
+        # Indices of the same file stay together, so a file whose
+        # windows are batched is still decoded once
+        if group is None:
+            group = np.arange(len(duration))
+
+        boundary = np.flatnonzero(np.diff(group)) + 1
+        self.group = np.split(np.arange(len(group)), boundary)
+
+        duration = np.asarray(duration)
+        length = np.array([duration[g[0]] for g in self.group])
+
+        # Buckets of equal size, from the shortest files to the longest
+        order = np.argsort(length, kind='stable')
+        self.buckets = np.array_split(order, min(bucket, len(order)))
+
+    def _batches(self, generator: np.random.Generator) -> list[list[int]]:
+        batches = []
+
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = generator.permutation(bucket)
+
+            indices = [
+                i
+                for g in bucket
+                for i in self.group[g].tolist()
+            ]
+
+            batches.extend(
+                indices[i:i + self.batch_size]
+                for i in range(0, len(indices), self.batch_size)
+            )
+
+        return batches
+
+    def __len__(self) -> int:
+        return sum(
+            math.ceil(
+                sum(len(self.group[g]) for g in bucket) / self.batch_size
+            )
+            for bucket in self.buckets
+        )
+
+    def __iter__(self) -> Iterator[list[int]]:
+        generator = np.random.default_rng([self.seed, self.epoch])
+        self.epoch = self.epoch + 1
+
+        batches = self._batches(generator)
+
+        # Every batch holds files of a similar duration, while the order
+        # of the batches is still random
+        if self.shuffle:
+            order = generator.permutation(len(batches))
+            batches = [batches[i] for i in order]
+
+        yield from batches
+
+
+class Batch(list):
+    # The indices of a batch, and those of the next batch that goes to
+    # the same loader worker
+    ahead: list[int]
+
+
+class LookaheadSampler(Sampler[list[int]]):
+    def __init__(
+        self,
+        sampler: Iterable[list[int]],
+        indices: list[int] | None = None,
+        stride: int = 1
+    ):
+        self.indices = indices
+        self.sampler = sampler
+        self.stride = stride
+
+    def __len__(self) -> int:
+        return len(self.sampler)
+
+    def _map(self, batch: list[int]) -> list[int]:
+        # The positions of a split are mapped to the dataset, like a
+        # Subset would, so the batch reaches the dataset as it is
+        if self.indices is None:
+            return list(batch)
+
+        return [self.indices[i] for i in batch]
+
+    def __iter__(self) -> Iterator[Batch]:
+        iterator = iter(self.sampler)
+        pending = deque()
+
+        for batch in iterator:
+            pending.append(self._map(batch))
+
+            if len(pending) > self.stride:
+                break
+
+        # The loader hands batches to its workers in turn, so the next
+        # batch of a worker is the one a stride later
+        while pending:
+            batch = Batch(pending.popleft())
+
+            following = next(iterator, None)
+
+            if following is not None:
+                pending.append(self._map(following))
+
+            if len(pending) >= self.stride:
+                batch.ahead = pending[self.stride - 1]
+            else:
+                batch.ahead = []
+
+            yield batch
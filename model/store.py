@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import numpy as np
+import torch
+
+from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from torch.utils.data import Dataset
+    from typing_extensions import Any
+
+
+class FeatureStore():
+    def __init__(
+        self,
+        path: Path | None = None,
+        settings: dict[str, Any] | None = None
+    ):
+        self.path = path
+        self.settings = settings
+        self._feature = None
+        self._label = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Each worker maps the store itself rather than receiving a copy
+        state = self.__dict__.copy()
+        state['_feature'] = None
+        state['_label'] = None
+
+        return state
+
+    def __len__(self) -> int:
+        self._open()
+        return len(self._label)
+
+    def fingerprint(self, dataset: Dataset) -> str:
+        keys = ['hop_length', 'n_fft', 'n_mels', 'sample', 'sample_rate']
+
+        settings = {
+            key: self.settings.get(key)
+            for key in keys
+        }
+
+        annotation = dataset.annotation[['path', 'label']].to_csv(index=False)
+
+        content = json.dumps(settings, sort_keys=True) + annotation
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def valid(self, dataset: Dataset) -> bool:
+        metadata = self.path.joinpath('metadata.json')
+
+        if not metadata.exists():
+            return False
+
+        with open(metadata, 'r') as handle:
+            metadata = json.load(handle)
+
+        return metadata.get('fingerprint') == self.fingerprint(dataset)
+
+    def build(self, dataset: Dataset) -> None:
+        self.path.mkdir(exist_ok=True, parents=True)
+        self.path.joinpath('metadata.json').unlink(missing_ok=True)
+
+        self._feature = None
+        self._label = None
+
+        length = len(dataset)
+
+        signal, _ = dataset[0]
+        shape = (length, *signal.shape)
+
+        feature = np.lib.format.open_memmap(
+            self.path.joinpath('feature.npy'),
+            mode='w+',
+            dtype=np.float32,
+            shape=shape
+        )
+
+        label = np.empty(length, dtype=np.int64)
+
+        for i in tqdm(range(length), total=length):
+            signal, label[i] = dataset[i]
+            feature[i] = signal.cpu().numpy()
+
+        feature.flush()
+        del feature
+
+        np.save(self.path.joinpath('label.npy'), label)
+
+        # The fingerprint is written last, so an interrupted build is
+        # never mistaken for a complete one
+        metadata = {
+            'fingerprint': self.fingerprint(dataset),
+            'settings': self.settings,
+            'shape': shape
+        }
+
+        with open(self.path.joinpath('metadata.json'), 'w') as handle:
+            json.dump(metadata, handle, indent=4)
+
+    def _open(self) -> None:
+        if self._feature is None:
+            self._feature = np.load(
+                self.path.joinpath('feature.npy'),
+                mmap_mode='r'
+            )
+
+            self._label = np.load(
+                self.path.joinpath('label.npy')
+            )
+
+    def read(self, index: int) -> tuple[torch.Tensor, int]:
+        self._open()
+
+        signal = torch.from_numpy(
+            np.array(self._feature[index])
+        )
+
+        return signal, int(self._label[index])
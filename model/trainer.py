@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import statistics
+import time
 import torch
 
+from torch.nn.functional import kl_div, log_softmax, softmax
 from tqdm import tqdm
 from typing import TYPE_CHECKING
 
@@ -11,17 +14,21 @@ if TYPE_CHECKING:
     from torch.optim.adam import Adam
     from torch.optim.lr_scheduler import StepLR
     from torch.utils.data.dataloader import DataLoader
+    from typing_extensions import Any
 
 
 class Trainer():
     def __init__(
         self,
+        alpha: float = 0.5,
         device: str | torch.device = 'cpu',
         epoch: int = 0,
         loss: CrossEntropyLoss = None,
         model: Model = None,
         optimizer: Adam = None,
         scheduler: StepLR = None,
+        teacher: Model = None,
+        temperature: float = 4.0,
         testing: DataLoader = None,
         training: DataLoader = None,
         validating: DataLoader = None,
@@ -29,15 +36,59 @@ class Trainer():
     ):
         self._model = model
 
+        self.alpha = alpha
         self.device = device
         self.epoch = epoch
         self.loss = loss
         self.scheduler = scheduler
+        self.teacher = teacher
+        self.temperature = temperature
         self.testing = testing
         self.training = training
         self.validating = validating
         self.optimizer = optimizer
 
+    def __getstate__(self) -> dict[str, Any]:
+        # The loaders hold their worker processes and the teacher is
+        # saved on its own, so neither is pickled with the trainer
+        state = self.__dict__.copy()
+        state['teacher'] = None
+        state['testing'] = None
+        state['training'] = None
+        state['validating'] = None
+
+        return state
+
+    def _distill(
+        self,
+        x: torch.Tensor,
+        logit: torch.Tensor,
+        output: torch.Tensor
+    ) -> torch.Tensor:
+        with torch.no_grad():
+            target = self.teacher(x)
+
+        temperature = self.temperature
+
+        # Both models end in a softmax, so their log probabilities stand
+        # in for the logits that the temperature softens
+        student = log_softmax(
+            torch.log(logit.clamp_min(1e-8)) / temperature,
+            dim=1
+        )
+
+        teacher = softmax(
+            torch.log(target.clamp_min(1e-8)) / temperature,
+            dim=1
+        )
+
+        divergence = kl_div(student, teacher, reduction='batchmean')
+
+        return (
+            self.alpha * divergence * temperature ** 2 +
+            (1 - self.alpha) * output
+        )
+
     def _single_validation_epoch(self) -> tuple[float, float]:
         self.model.eval()
 
@@ -48,8 +99,8 @@ class Trainer():
         progress = tqdm(self.validating, total=total)
 
         for x, y in progress:
-            x = x.to(self.device)
-            y = y.to(self.device)
+            x = x.to(self.device, non_blocking=True)
+            y = y.to(self.device, non_blocking=True)
 
             logit = self.model(x)
 
@@ -77,13 +128,16 @@ class Trainer():
         progress = tqdm(self.training, total=total)
 
         for x, y in progress:
-            x = x.to(self.device)
-            y = y.to(self.device)
+            x = x.to(self.device, non_blocking=True)
+            y = y.to(self.device, non_blocking=True)
 
             logit = self.model(x)
 
             output = self.loss(logit, y)
 
+            if self.teacher is not None:
+                output = self._distill(x, logit, output)
+
             total_loss = total_loss + output.item()
 
             _, prediction = torch.max(logit, dim=1)
@@ -103,9 +157,66 @@ class Trainer():
             total_accuracy / len(self.training.dataset)
         )
 
+    def _accuracy(self, model: torch.nn.Module) -> float:
+        model.eval()
+
+        total_accuracy = 0
+
+        with torch.no_grad():
+            for x, y in tqdm(self.testing, total=len(self.testing)):
+                x = x.to(self.device, non_blocking=True)
+                y = y.to(self.device, non_blocking=True)
+
+                _, prediction = torch.max(model(x), dim=1)
+
+                correct = torch.sum(prediction == y).item()
+                total_accuracy = total_accuracy + correct
+
+        return total_accuracy / len(self.testing.dataset)
+
+    def _latency(self, model: torch.nn.Module, repeat: int = 100) -> float:
+        # Measured on the CPU, one clip at a time, as it is deployed
+        model.cpu().eval()
+
+        x, _ = next(iter(self.testing))
+        x = x[:1].cpu()
+
+        elapsed = []
+
+        with torch.no_grad():
+            for _ in range(repeat):
+                start = time.perf_counter()
+                model(x)
+                elapsed.append(time.perf_counter() - start)
+
+        model.to(self.device)
+
+        return statistics.median(elapsed)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        report = {}
+
+        models = {'student': self.model, 'teacher': self.teacher}
+
+        for name, model in models.items():
+            if model is None:
+                continue
+
+            report[name] = {
+                'accuracy': self._accuracy(model),
+                'parameters': sum(p.numel() for p in model.parameters()),
+                'latency': self._latency(model)
+            }
+
+        return report
+
     def start(self) -> None:
         self.model.to(self.device)
 
+        if self.teacher is not None:
+            self.teacher.to(self.device)
+            self.teacher.eval()
+
         history = {
             'training': {
                 'classification_accuracy': [],
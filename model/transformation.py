@@ -6,6 +6,40 @@ from torchaudio.transforms import MelSpectrogram, Resample
 from typing import Any
 
 
+MARKER = 'reverb:canonical'
+
+_resampler = {}
+
+
+def resampler(
+    rate: int,
+    target: int,
+    device: str | torch.device | None = None,
+    dtype: torch.dtype = torch.float32
+) -> Resample:
+    device = torch.device(device or 'cpu')
+    key = (rate, target, device, dtype)
+
+    # Building a Resample computes its sinc kernel, so one is kept for
+    # every pair of rates, device and dtype
+    if key not in _resampler:
+        _resampler[key] = Resample(rate, target, dtype=dtype).to(device)
+
+    return _resampler[key]
+
+
+def warm(
+    rates: list[int],
+    target: int,
+    device: str | torch.device | None = None,
+    dtype: torch.dtype = torch.float32
+) -> None:
+    # Called before DataLoader workers fork, so they inherit the kernels
+    for rate in set(rates):
+        if rate != target:
+            resampler(rate, target, device, dtype)
+
+
 class Transformation(torch.nn.Module):
     def __init__(
         self,
@@ -19,6 +53,32 @@ class Transformation(torch.nn.Module):
         self.device = device
         self.settings = settings
 
+    @property
+    def mel(self) -> MelSpectrogram:
+        return self._mel
+
+    def _field(self, comment: str | None) -> dict[str, str]:
+        if not comment or not comment.startswith(MARKER):
+            return {}
+
+        return dict(
+            item.split('=', 1)
+            for item in comment.split()[1:]
+            if '=' in item
+        )
+
+    def canonical(self, comment: str | None) -> bool:
+        field = self._field(comment)
+
+        # Without the statistics of its source, a canonical file is
+        # normalized like any other
+        return (
+            field.get('rate') == str(self.settings.get('sample_rate')) and
+            field.get('channels') == '1' and
+            'mean' in field and
+            'deviation' in field
+        )
+
     def _cut(self, signal: torch.Tensor) -> torch.Tensor:
         target = self.settings.get('sample_rate')
 
@@ -38,8 +98,15 @@ class Transformation(torch.nn.Module):
         signal = torch.mean(signal, dim=0, keepdim=True)
         return signal
 
-    def _normalize(self, signal: torch.Tensor) -> torch.Tensor:
-        mean, deviation = signal.mean(), signal.std()
+    def _normalize(
+        self,
+        signal: torch.Tensor,
+        mean: float | None = None,
+        deviation: float | None = None
+    ) -> torch.Tensor:
+        if mean is None or deviation is None:
+            mean, deviation = signal.mean(), signal.std()
+
         return (signal - mean) / deviation
 
     def _pad(self, signal: torch.Tensor) -> torch.Tensor:
@@ -61,17 +128,160 @@ class Transformation(torch.nn.Module):
         if rate == target:
             return signal
 
-        resample = Resample(rate, target).to(self.device)
+        resample = resampler(rate, target, signal.device, signal.dtype)
         signal = resample(signal)
 
         return signal
 
-    def forward(self, x: torch.Tensor, rate: int) -> torch.Tensor:
+    def waveform(
+        self,
+        x: torch.Tensor,
+        rate: int,
+        comment: str | None = None
+    ) -> torch.Tensor:
+        # Canonical audio is already at the target rate and in mono, and
+        # is normalized with the statistics of the whole source
+        if self.canonical(comment):
+            field = self._field(comment)
+
+            return self._normalize(
+                x,
+                float(field['mean']),
+                float(field['deviation'])
+            )
+
         x = self._normalize(x)
         x = self._resample(x, rate)
         x = self._mixdown(x)
+
+        return x
+
+    def spectrogram(self, x: torch.Tensor) -> torch.Tensor:
         x = self._cut(x)
         x = self._pad(x)
         x = self._mel(x)
 
         return x
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        rate: int,
+        comment: str | None = None
+    ) -> torch.Tensor:
+        x = self.waveform(x, rate, comment)
+        x = self.spectrogram(x)
+
+        return x
+
+
+class BatchTransformation(torch.nn.Module):
+    def __init__(
+        self,
+        device: str | torch.device | None = None,
+        settings: dict[str, Any] = None
+    ):
+        super().__init__()
+
+        self._mel = MelSpectrogram(**settings).to(device)
+
+        self.device = device
+        self.settings = settings
+
+    def _mask(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        _, _, y = x.shape
+
+        mask = torch.arange(y, device=x.device) < lengths.unsqueeze(1)
+        return mask.unsqueeze(1)
+
+    def _normalize(
+        self,
+        x: torch.Tensor,
+        lengths: torch.Tensor,
+        mean: torch.Tensor | None = None,
+        deviation: torch.Tensor | None = None
+    ) -> torch.Tensor:
+        _, channels, _ = x.shape
+
+        mask = self._mask(x, lengths)
+
+        # The statistics of a clip that was cut in the collate step are
+        # passed in from the whole clip
+        if mean is not None and deviation is not None:
+            mean = mean.view(-1, 1, 1)
+            deviation = deviation.view(-1, 1, 1)
+
+            return (x - mean) / deviation * mask
+
+        count = (lengths * channels).view(-1, 1, 1)
+
+        mean = torch.sum(x * mask, dim=(1, 2), keepdim=True) / count
+
+        deviation = torch.sum(
+            ((x - mean) * mask) ** 2,
+            dim=(1, 2),
+            keepdim=True
+        )
+
+        deviation = torch.sqrt(deviation / (count - 1))
+
+        return (x - mean) / deviation * mask
+
+    def _resample(
+        self,
+        x: torch.Tensor,
+        lengths: torch.Tensor,
+        rates: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        target = self.settings.get('sample_rate')
+
+        batch, channels, _ = x.shape
+
+        output = torch.zeros(batch, channels, target, device=x.device)
+        lengths = lengths.clone()
+
+        # Every source rate is resampled as one group
+        for rate in torch.unique(rates).tolist():
+            group = rates == rate
+            signal = x[group]
+
+            if rate != target:
+                resample = resampler(rate, target, x.device, x.dtype)
+                signal = resample(signal)
+
+                lengths[group] = torch.ceil(
+                    lengths[group] * target / rate
+                ).long()
+
+            signal = signal[..., :target]
+            output[group, :, :signal.shape[-1]] = signal
+
+        lengths = torch.clamp(lengths, max=target)
+
+        return output * self._mask(output, lengths), lengths
+
+    def _mixdown(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.mean(x, dim=1, keepdim=True)
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        lengths: torch.Tensor,
+        rates: torch.Tensor,
+        mean: torch.Tensor | None = None,
+        deviation: torch.Tensor | None = None
+    ) -> torch.Tensor:
+        x = x.to(self.device)
+        lengths = lengths.to(self.device)
+        rates = rates.to(self.device)
+
+        if mean is not None and deviation is not None:
+            mean = mean.to(self.device)
+            deviation = deviation.to(self.device)
+
+        x = self._normalize(x, lengths, mean, deviation)
+        x, lengths = self._resample(x, lengths, rates)
+        x = self._mixdown(x)
+        x = self._mel(x)
+
+        return x
@@ -43,7 +43,7 @@ class Envelope():
 
     @classmethod
     def from_tensor(cls: type[Self], tensor: npt.NDArray) -> tuple[Figure, Axes]:
-        signal = tensor.squeeze().cpu().numpy()
+        signal = np.asarray(tensor).squeeze()
 
         analytic = hilbert(signal)
         envelope = np.abs(analytic)
@@ -123,7 +123,7 @@ class Spectrogram():
         fmin = 0
         fmax = sr / 2
 
-        signal = tensor.squeeze().cpu().numpy()
+        signal = np.asarray(tensor).squeeze()
 
         figsize = (18, 4)
         fig, ax = plt.subplots(figsize=figsize)